@@ -0,0 +1,59 @@
+"""
+Сгенерированные тестовые ролики, общие для бенчмарков.
+"""
+import os
+
+import cv2
+import numpy as np
+
+
+def synthetic_frame(base, i):
+    """
+    Кадр с движущимся шумом и номером кадра.
+    """
+    frame = np.roll(base, i * 4, axis=1)
+    cv2.putText(frame, str(i), (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+    return frame
+
+
+def make_synthetic_video(path, num_frames, size=(640, 360), fps=25):
+    """
+    Генерация тестового ролика MPEG-4 Part 2 через OpenCV.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    base = np.random.default_rng(0).integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    for i in range(num_frames):
+        writer.write(synthetic_frame(base, i))
+    writer.release()
+    return path
+
+
+def make_h264_video(path, num_frames, size=(640, 360), fps=25, gop=250, b_frames=2):
+    """
+    Генерация ролика H.264 через PyAV с заданным интервалом ключевых кадров.
+    Контейнер определяется расширением (в .mkv число кадров не хранится в заголовке потока).
+    """
+    import av
+
+    base = np.random.default_rng(0).integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    with av.open(path, "w") as container:
+        stream = container.add_stream("libx264", rate=fps)
+        stream.width, stream.height = size
+        stream.pix_fmt = "yuv420p"
+        stream.options = {"g": str(gop), "bf": str(b_frames)}
+        for i in range(num_frames):
+            frame = av.VideoFrame.from_ndarray(synthetic_frame(base, i), format="bgr24")
+            container.mux(stream.encode(frame))
+        container.mux(stream.encode())
+    return path
+
+
+def make_clip_suite(directory, num_frames=3000):
+    """
+    Набор роликов для сравнения декодеров: разные кодеки, контейнеры и интервалы ключевых кадров.
+    """
+    return [
+        make_synthetic_video(os.path.join(directory, "mpeg4.mp4"), num_frames),
+        make_h264_video(os.path.join(directory, "h264_gop250.mp4"), num_frames, gop=250),
+        make_h264_video(os.path.join(directory, "h264_gop50.mkv"), num_frames, gop=50),
+    ]
@@ -0,0 +1,84 @@
+"""
+Сравнение стратегий выборки кадров (seek / sequential / parallel) на длинных видео.
+
+    python -m benchmarks.frame_sampling --video long.mp4 --max-frames 60
+    python -m benchmarks.frame_sampling --video long.mp4 --max-frames 120 --threads 4
+    python -m benchmarks.frame_sampling --synthetic-frames 6000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.clips import make_synthetic_video
+from worker.sampling import (
+    choose_sampling_mode,
+    iter_frames_parallel,
+    iter_frames_seek,
+    iter_frames_sequential,
+    parallel_decode_threads,
+    sample_frame_indices,
+)
+
+
+def time_strategy(video_path, max_frames, reader, repeat):
+    timings = []
+    frames = []
+    for _ in range(repeat):
+        cap = cv2.VideoCapture(video_path)
+        frame_idxs = sample_frame_indices(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), max_frames)
+        start = time.perf_counter()
+        frames = list(reader(cap, frame_idxs))
+        timings.append(time.perf_counter() - start)
+        cap.release()
+    return min(timings), frames
+
+
+def run(video_path, max_frames, repeat, threads):
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    seek_time, seek_frames = time_strategy(video_path, max_frames, iter_frames_seek, repeat)
+    seq_time, seq_frames = time_strategy(video_path, max_frames, iter_frames_sequential, repeat)
+    par_time, par_frames = time_strategy(
+        video_path, max_frames,
+        lambda cap, frame_idxs: iter_frames_parallel(video_path, frame_idxs, frame_count, threads),
+        repeat,
+    )
+    identical = all(
+        len(frames) == len(seek_frames) and all(np.array_equal(a, b) for a, b in zip(seek_frames, frames))
+        for frames in (seq_frames, par_frames)
+    )
+
+    print(f"{os.path.basename(video_path)}: {frame_count} frames, {max_frames} samples")
+    print(f"  seek:       {seek_time:8.3f}s ({len(seek_frames)} frames)")
+    print(f"  sequential: {seq_time:8.3f}s ({len(seq_frames)} frames)")
+    print(f"  parallel:   {par_time:8.3f}s ({len(par_frames)} frames, {threads} threads)")
+    print(f"  auto picks: {choose_sampling_mode(frame_count, max_frames)}, identical frames: {identical}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", action="append", default=[], help="Path to a video file (repeatable)")
+    parser.add_argument("--synthetic-frames", type=int, action="append", default=[],
+                        help="Generate a synthetic clip with this many frames (repeatable)")
+    parser.add_argument("--max-frames", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None, help="Parallel decoding threads")
+    args = parser.parse_args()
+
+    synthetic = args.synthetic_frames or ([] if args.video else [1500, 6000])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        videos = list(args.video)
+        for num_frames in synthetic:
+            videos.append(make_synthetic_video(os.path.join(tmp_dir, f"synthetic_{num_frames}.mp4"), num_frames))
+        for video_path in videos:
+            run(video_path, args.max_frames, args.repeat, args.threads or parallel_decode_threads())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Проверка INT8 режима инференса: согласие с fp32 и ускорение на локальном наборе видео.
+
+    python -m benchmarks.quantization --video a.mp4 --video b.mp4
+    python -m benchmarks.quantization --video-dir samples/ --max-frames 60
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.core.config import settings
+from worker.celery_tasks import aggregate_votes, embed_frames, load_models, preprocess_frames, score_frames
+from worker.sampling import extract_frames
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+
+def score_video(models, frames, batch_size):
+    """
+    Вероятности FAKE по кадрам и время backbone + MLP.
+    Ручные признаки содержат случайные компоненты, поэтому генератор фиксируется.
+    """
+    np.random.seed(0)
+    start = time.perf_counter()
+    features = np.concatenate([
+        embed_frames(models['engine'], preprocess_frames(frames[i:i + batch_size]))
+        for i in range(0, len(frames), batch_size)
+    ])
+    probs = score_frames(models['engine'], features)
+    return probs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", action="append", default=[], help="Path to a video file (repeatable)")
+    parser.add_argument("--video-dir", help="Directory with sample videos")
+    parser.add_argument("--max-frames", type=int, default=60)
+    args = parser.parse_args()
+
+    videos = list(args.video)
+    if args.video_dir:
+        videos += sorted(
+            os.path.join(args.video_dir, name) for name in os.listdir(args.video_dir)
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        )
+    if not videos:
+        parser.error("no sample videos given")
+
+    fp32 = load_models(engine="eager", precision="fp32")
+    int8 = load_models(engine="eager", precision="int8")
+    batch_size = settings.inference_batch_size
+
+    total_frames = agreeing_frames = agreeing_verdicts = 0
+    fp32_time = int8_time = 0.0
+    for video_path in videos:
+        frames = extract_frames(video_path, args.max_frames, min_side=fp32['preprocessor'].size)
+        if not frames:
+            print(f"{video_path}: no frames, skipped")
+            continue
+        fp32_probs, fp32_elapsed = score_video(fp32, frames, batch_size)
+        int8_probs, int8_elapsed = score_video(int8, frames, batch_size)
+
+        agreement = int(np.count_nonzero((fp32_probs >= 0.5) == (int8_probs >= 0.5)))
+        same_verdict = aggregate_votes(fp32_probs)['verdict'] == aggregate_votes(int8_probs)['verdict']
+        total_frames += len(frames)
+        agreeing_frames += agreement
+        agreeing_verdicts += same_verdict
+        fp32_time += fp32_elapsed
+        int8_time += int8_elapsed
+        print(
+            f"{os.path.basename(video_path)}: {len(frames)} frames, "
+            f"frame agreement {agreement / len(frames):.2%}, "
+            f"max |dp| {np.abs(fp32_probs - int8_probs).max():.4f}, "
+            f"verdict {'same' if same_verdict else 'DIFFERENT'}, "
+            f"fp32 {fp32_elapsed:.2f}s, int8 {int8_elapsed:.2f}s"
+        )
+
+    if total_frames:
+        print(
+            f"\nTotal: {total_frames} frames, frame agreement {agreeing_frames / total_frames:.2%}, "
+            f"verdict agreement {agreeing_verdicts}/{len(videos)}, speedup {fp32_time / int8_time:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
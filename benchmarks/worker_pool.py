@@ -0,0 +1,94 @@
+"""
+Пропускная способность воркера (видео в минуту) в зависимости от числа процессов.
+Модели загружаются один раз в родительском процессе, дочерние получают их через fork,
+как в prefork пуле Celery. Кеш эмбеддингов отключается, чтобы повторы видео не искажали замер.
+
+    python -m benchmarks.worker_pool --video a.mp4 --processes 1,2,4
+    python -m benchmarks.worker_pool --video-dir samples/ --videos 16 --max-frames 30
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+
+from src.core.config import settings
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+
+def private_memory_mb():
+    """
+    Память, не разделяемая с другими процессами (Private_Clean + Private_Dirty), в МБ.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith("Private_"))
+    except OSError:
+        return None
+    return sum(int(value.split()[0]) for value in fields.values()) / 1024
+
+
+def init_process(processes, counter):
+    from worker.celery_tasks import setup_worker_process
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    setup_worker_process(processes, index)
+
+
+def analyze(args):
+    from worker.celery_tasks import run_prediction
+    video_path, max_frames = args
+    run_prediction(video_path, max_frames)
+    return os.getpid(), private_memory_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", action="append", default=[], help="Path to a video file (repeatable)")
+    parser.add_argument("--video-dir", help="Directory with sample videos")
+    parser.add_argument("--processes", default="1,2,4", help="Comma separated process counts")
+    parser.add_argument("--videos", type=int, default=8, help="Videos analyzed per measurement")
+    parser.add_argument("--max-frames", type=int, default=60)
+    args = parser.parse_args()
+
+    videos = list(args.video)
+    if args.video_dir:
+        videos += sorted(
+            os.path.join(args.video_dir, name) for name in os.listdir(args.video_dir)
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        )
+    if not videos:
+        parser.error("no sample videos given")
+
+    settings.embedding_cache_enabled = False
+    # Загрузка моделей в родительском процессе, до форка
+    from worker.celery_tasks import init_models
+    init_models()
+
+    context = multiprocessing.get_context("fork")
+    jobs = [(video, args.max_frames) for video in itertools.islice(itertools.cycle(videos), args.videos)]
+    print(f"{os.cpu_count()} CPUs, {len(jobs)} videos, parent private memory {private_memory_mb() or 0:.0f} MB")
+
+    baseline = None
+    for processes in [int(count) for count in args.processes.split(",") if count]:
+        counter = context.Value("i", 0)
+        with context.Pool(processes, initializer=init_process, initargs=(processes, counter)) as pool:
+            start = time.perf_counter()
+            results = pool.map(analyze, jobs, chunksize=1)
+            elapsed = time.perf_counter() - start
+
+        memory = {pid: mb for pid, mb in results if mb is not None}
+        videos_per_minute = len(jobs) / elapsed * 60
+        baseline = baseline or videos_per_minute
+        print(
+            f"{processes} processes: {videos_per_minute:.1f} videos/min ({videos_per_minute / baseline:.2f}x), "
+            f"{elapsed:.1f}s, private memory per process "
+            f"{sum(memory.values()) / len(memory) if memory else 0:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
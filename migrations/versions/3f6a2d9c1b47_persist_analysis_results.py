@@ -0,0 +1,48 @@
+"""persist analysis results
+
+Revision ID: 3f6a2d9c1b47
+Revises: 80ce7cc36680
+Create Date: 2026-10-18 12:04:31.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a2d9c1b47'
+down_revision: Union[str, None] = '80ce7cc36680'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VOTE_COLUMNS = ('real_votes', 'fake_votes', 'total_frames')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('analysis_results', 'prediction', new_column_name='verdict', existing_type=sa.String(length=255), existing_nullable=False)
+    # Existing rows get zero votes; the default is only needed to fill them
+    for column in VOTE_COLUMNS:
+        op.add_column('analysis_results', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+        op.alter_column('analysis_results', column, server_default=None)
+    op.add_column('analysis_results', sa.Column('tier', sa.String(length=32), nullable=True))
+    op.add_column('analysis_results', sa.Column('model_version', sa.String(length=100), nullable=True))
+    op.add_column('analysis_results', sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.create_index(op.f('ix_analysis_results_task_id'), 'analysis_results', ['task_id'], unique=False)
+    op.create_unique_constraint('uq_analysis_results_task_id_video_id', 'analysis_results', ['task_id', 'video_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_analysis_results_task_id_video_id', 'analysis_results', type_='unique')
+    op.drop_index(op.f('ix_analysis_results_task_id'), table_name='analysis_results')
+    op.drop_column('analysis_results', 'details')
+    op.drop_column('analysis_results', 'model_version')
+    op.drop_column('analysis_results', 'tier')
+    for column in reversed(VOTE_COLUMNS):
+        op.drop_column('analysis_results', column)
+    op.alter_column('analysis_results', 'verdict', new_column_name='prediction', existing_type=sa.String(length=255), existing_nullable=False)
@@ -1,9 +1,12 @@
+from typing import List, Optional
 from authx import TokenPayload
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from src.schemas.model_schema import ModelResultSchema, ModelSchema
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from src.schemas.model_schema import BatchSchema, ModelResultSchema, ModelSchema
 from src.schemas.responses.general_response import GeneralResponse
 from src.usecases.model_usecase import ModelUseCase, get_model_use_case
 from src.usecases.user_usecase import UserUseCase, get_user_use_case
+from src.inference.tiers import AnalysisTier, tier_for_plan
 from src.api.http.dependencies import security
 
 
@@ -12,12 +15,14 @@ router = APIRouter(prefix="/model", tags=["model"])
 @router.post("/analyze", response_model=GeneralResponse[ModelSchema])
 async def analyze_video(
     file: UploadFile = File(...),
+    tier: Optional[AnalysisTier] = None,
     model_use_case: ModelUseCase = Depends(get_model_use_case),
     user_use_case: UserUseCase = Depends(get_user_use_case),
     token_payload: TokenPayload = Depends(security.access_token_required),
 ) -> GeneralResponse[ModelSchema]:
     """
     Analyze a video file and return the result.
+    The analysis tier defaults from the user's subscription plan.
     """
     user = await user_use_case.get_user_by_fields(email=token_payload.sub)
     if not user:
@@ -26,7 +31,8 @@ async def analyze_video(
     print(f"Received file: {file.filename}")
 
     file_name = f"{user.email}/{file.filename}"
-    result = await model_use_case.analyze_video(user_id=user.id, file=file.file, file_name=file_name)
+    tier = tier or tier_for_plan(user.subscription_plan, user.subscription_expiry)
+    result = await model_use_case.analyze_video(user_id=user.id, file=file.file, file_name=file_name, tier=tier)
 
     return GeneralResponse[ModelSchema](
         status="success",
@@ -38,6 +44,7 @@ async def analyze_video(
 @router.post("/analyze/url", response_model=GeneralResponse[ModelSchema])
 async def analyze_video_url(
     video_url: str,
+    tier: Optional[AnalysisTier] = None,
     model_use_case: ModelUseCase = Depends(get_model_use_case),
     user_use_case: UserUseCase = Depends(get_user_use_case),
     token_payload: TokenPayload = Depends(security.access_token_required),
@@ -49,7 +56,8 @@ async def analyze_video_url(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    result = await model_use_case.analyze_video(user_id=user.id, file=video_url, file_name=video_url)
+    tier = tier or tier_for_plan(user.subscription_plan, user.subscription_expiry)
+    result = await model_use_case.analyze_video(user_id=user.id, file=video_url, file_name=video_url, tier=tier)
 
     return GeneralResponse[ModelSchema](
         status="success",
@@ -57,6 +65,52 @@ async def analyze_video_url(
         data=result
     )
 
+@router.post("/analyze/batch", response_model=GeneralResponse[BatchSchema])
+async def analyze_batch(
+    files: Optional[List[UploadFile]] = File(None),
+    video_ids: Optional[List[int]] = Form(None),
+    tier: Optional[AnalysisTier] = None,
+    model_use_case: ModelUseCase = Depends(get_model_use_case),
+    user_use_case: UserUseCase = Depends(get_user_use_case),
+    token_payload: TokenPayload = Depends(security.access_token_required),
+) -> GeneralResponse[BatchSchema]:
+    """
+    Analyze many uploaded files and stored videos in one batch and return the batch ID.
+    """
+    user = await user_use_case.get_user_by_fields(email=token_payload.sub)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    tier = tier or tier_for_plan(user.subscription_plan, user.subscription_expiry)
+    uploads = [(file.file, f"{user.email}/{file.filename}") for file in files or []]
+    try:
+        result = await model_use_case.analyze_batch(user_id=user.id, files=uploads, video_ids=video_ids or [], tier=tier)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return GeneralResponse[BatchSchema](
+        status="success",
+        message="Batch analysis started successfully",
+        data=result
+    )
+
+
+@router.get("/analyze/batch/{batch_id}", dependencies=[Depends(security.access_token_required)], response_model=GeneralResponse[BatchSchema])
+async def get_batch(
+    batch_id: str,
+    use_case: ModelUseCase = Depends(get_model_use_case),
+) -> GeneralResponse[BatchSchema]:
+    """
+    Retrieve the progress and results of a batch analysis.
+    """
+    result = await use_case.get_batch(batch_id)
+    return GeneralResponse[BatchSchema](
+        status="success",
+        message="Batch retrieved successfully",
+        data=result
+    )
+
+
 @router.get("/result/{task_id}", dependencies=[Depends(security.access_token_required)], response_model=GeneralResponse[ModelSchema])
 async def get_result(
     task_id: str,
@@ -76,4 +130,22 @@ async def get_result(
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    
+
+
+@router.get("/result/{task_id}/stream", dependencies=[Depends(security.access_token_required)])
+async def stream_result(
+    task_id: str,
+    use_case: ModelUseCase = Depends(get_model_use_case),
+) -> StreamingResponse:
+    """
+    Stream the progress of an analysis as server-sent events, ending with a "result" event
+    that carries the same payload as GET /model/result/{task_id}.
+    """
+    async def events():
+        async for event in use_case.stream_result(task_id):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event.event}\ndata: {event.model_dump_json()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
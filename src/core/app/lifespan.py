@@ -1,6 +1,7 @@
 from contextlib import asynccontextmanager
 from ..connections.connection import Connection
 from ..connections.database.postgres_connection import postgres
+from ..connections.cache.redis_connection import redis_cache
 from ..logger.logger import logger
 
 
@@ -8,10 +9,12 @@ from ..logger.logger import logger
 async def lifespan(app):
     logger.info("Starting up the application...")
     await startup(postgres)
+    await startup(redis_cache)
     logger.info("Application started up successfully.")
     yield
     logger.info("Shutting down the application...")
     await shutdown(postgres)
+    await shutdown(redis_cache)
     logger.info("Application shut down successfully.")
 
 
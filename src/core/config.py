@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     redis_port: int
     redis_password: str = None
     redis_user: str = None
+    redis_cache_db: int = 1
 
     # JWT
     jwt_secret: str
@@ -24,6 +25,103 @@ class Settings(BaseSettings):
     s3_bucket_name: str
     s3_region_name: str = "us-east-1"
 
+    # Result cache
+    model_version: str = "effnet_b4-mlp_v2"
+    result_cache_ttl: int = 7 * 24 * 3600
+    in_flight_ttl: int = 3600
+
+    # Task progress events (seconds without events before the stream re-checks the task state)
+    progress_events_enabled: bool = True
+    progress_idle_timeout: int = 15
+
+    # Result persistence (finished analyses are written to analysis_results in batches of up to
+    # result_store_batch_size rows or every result_store_flush_interval seconds)
+    result_store_enabled: bool = True
+    result_store_batch_size: int = 50
+    result_store_flush_interval: float = 2.0
+    result_store_max_pending: int = 5000
+    # Celery result backend TTL: persisted results are served from Postgres
+    result_backend_ttl: int = 6 * 3600
+
+    # Analysis tiers
+    default_analysis_tier: str = "standard"
+    # e.g. {"free": "fast"} once the fast tier's model version is published
+    analysis_tier_by_plan: dict[str, str] = {}
+    preload_analysis_tiers: list[str] = ["standard"]
+    fast_tier_model_version: str = "effnet_b0-mlp_v2"
+    fast_tier_input_size: int = 224
+    fast_tier_max_frames: int = 16
+    thorough_tier_max_frames: int = 120
+
+    # Model registry
+    model_registry_dir: str = "models/registry"
+    model_registry_verify: bool = True
+
+    # Inference
+    inference_precision: str = "fp32"
+    inference_batch_size: int = 8
+    vote_mode: str = "hard"
+    pipeline_queue_size: int = 4
+    # The published head was trained on BGR backbone inputs (the original ToPILImage chain);
+    # switch to "rgb" only together with a head retrained on RGB features
+    preprocess_channel_order: str = "bgr"
+    inference_engine: str = "eager"
+    engine_artifact_dir: str = "models/exported"
+    torchscript_onednn_fusion: bool = True
+    torch_intra_op_threads: int = 0
+    torch_inter_op_threads: int = 0
+
+    # Inference server
+    inference_server_socket: str = "/tmp/lookout-inference.sock"
+    inference_server_engine: str = "eager"
+    inference_server_max_batch_size: int = 32
+    inference_server_max_wait_ms: int = 10
+
+    # Worker pool
+    worker_processes: int = 1
+
+    # Batch analysis
+    batch_max_videos: int = 500
+    batch_upload_concurrency: int = 8
+
+    # Source video cache
+    video_cache_enabled: bool = True
+    video_cache_dir: str = "cache/videos"
+    video_cache_max_bytes: int = 10 * 1024 * 1024 * 1024
+    video_download_timeout: int = 60
+
+    # Embedding cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_memory_items: int = 4096
+    embedding_cache_dir: str = "cache/embeddings"
+    embedding_cache_disk_bytes: int = 512 * 1024 * 1024
+
+    # Near-duplicate frame suppression (off until verdicts are checked against the non-deduped path)
+    dedupe_enabled: bool = False
+    dedupe_max_distance: int = 8
+    dedupe_refill: bool = False
+
+    # Video decoding (opencv or pyav; 0 decoder threads = CPU count / worker processes)
+    video_decoder: str = "opencv"
+    decoder_threads: int = 0
+
+    # Frame sampling
+    frame_sampling_mode: str = "auto"
+    sequential_sampling_min_density: float = 0.02
+    adaptive_sampling: bool = False
+    adaptive_min_frames: int = 15
+    adaptive_confidence: float = 0.95
+
+    # Parallel segment decoding in threads (0 threads = CPU count / worker processes;
+    # 0 min frames = auto mode never picks it, "parallel" has to be requested explicitly)
+    parallel_decode_threads: int = 0
+    parallel_decode_min_frames: int = 0
+
+    # Bounded frame extraction (frames are downscaled to the working resolution at decode time)
+    bounded_extraction: bool = True
+    decode_max_side: int = 1920
+    frame_memory_budget: int = 256 * 1024 * 1024
+
     class Config:
         env_file = ".env"
 
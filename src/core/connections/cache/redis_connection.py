@@ -0,0 +1,32 @@
+import asyncio
+import redis
+import redis.asyncio
+from src.core.logger.logger import logger
+from src.core.config import settings, Settings
+from ..connection import Connection
+
+
+class RedisConnection(Connection):
+    def __init__(self, settings: Settings, db: int = 0) -> None:
+        self.client = redis.Redis.from_url(settings.redis_url(db), decode_responses=True)
+        # Async client for long-lived operations such as pub/sub subscriptions
+        self.async_client = redis.asyncio.Redis.from_url(settings.redis_url(db), decode_responses=True)
+
+    async def connect(self):
+        try:
+            await asyncio.to_thread(self.client.ping)
+        except Exception as e:
+            logger.error(f"Failed to connect to Redis: {e}")
+            raise e
+
+    async def close(self):
+        try:
+            await asyncio.to_thread(self.client.close)
+            await self.async_client.aclose()
+            logger.info("Disconnected from Redis")
+        except Exception as e:
+            logger.error(f"Failed to disconnect from Redis: {e}")
+            raise e
+
+
+redis_cache = RedisConnection(settings, db=settings.redis_cache_db)
@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
-import torch
-import torchvision.models as models
-from worker.celery_tasks import predict
-from celery.result import AsyncResult
-from worker.celery_app import app
-from src.schemas.model_schema import ModelSchema, ModelResultSchema
+from typing import List, Optional
+from uuid import uuid4
+from src.schemas.model_schema import BatchSchema, ModelSchema, ModelResultSchema
+from .result_cache import ResultCache, result_cache
+from .tiers import AnalysisTier
+from .task_client import PREDICT_BATCH_TASK, PREDICT_TASK, TaskClient, task_client
 
 class ModelInference(ABC):
     """
@@ -12,9 +12,12 @@ class ModelInference(ABC):
     """
 
     @abstractmethod
-    def analyze_video(self, video_url: str) -> ModelSchema:
+    def analyze_video(self, video_url: str, content_hash: Optional[str] = None, tier: AnalysisTier = AnalysisTier.STANDARD, video_id: Optional[int] = None) -> ModelSchema:
         """
-        Analyze the given video and return the result.
+        Analyze the given video with the given analysis tier and return the result.
+        Videos with a known content hash reuse a cached or in-flight analysis of the same tier.
+        The finished result is persisted for the stored video with the given ID,
+        also when it comes from the cache or from an in-flight analysis of the same content.
         """
         pass
 
@@ -25,6 +28,21 @@ class ModelInference(ABC):
         """
         pass
 
+    @abstractmethod
+    def analyze_batch(self, items: List[dict], tier: AnalysisTier = AnalysisTier.STANDARD) -> BatchSchema:
+        """
+        Analyze many videos in one worker task.
+        Each item holds video_url and optionally video_id and content_hash.
+        """
+        pass
+
+    @abstractmethod
+    def get_batch(self, batch_id: str) -> BatchSchema:
+        """
+        Get the progress and results of a batch.
+        """
+        pass
+
 
 
 class ModelInferenceImpl(ModelInference):
@@ -32,14 +50,46 @@ class ModelInferenceImpl(ModelInference):
     Implementation of model inference.
     """
 
-    def analyze_video(self, video_url: str) -> ModelSchema:
+    def __init__(self, task_client: TaskClient, result_cache: ResultCache):
+        self.task_client = task_client
+        self.result_cache = result_cache
+
+    def analyze_video(self, video_url: str, content_hash: Optional[str] = None, tier: AnalysisTier = AnalysisTier.STANDARD, video_id: Optional[int] = None) -> ModelSchema:
+        if content_hash is None:
+            task_id = self.task_client.enqueue(PREDICT_TASK, args=[video_url], kwargs={"tier": tier.value, "video_id": video_id})
+            return ModelSchema(status="pending", task_id=task_id)
+
+        cached = self.result_cache.get(content_hash, tier)
+        if cached:
+            return ModelSchema(
+                status="success",
+                result=ModelResultSchema(**cached["result"]),
+                task_id=cached["task_id"]
+            )
+
+        task_id = str(uuid4())
+        in_flight_task_id = self.result_cache.claim(content_hash, task_id, tier)
+        if in_flight_task_id:
+            if video_id is not None:
+                self.result_cache.attach(in_flight_task_id, video_id)
+            # The task may have finished before the video was attached: the worker stores the
+            # result before it pops the attached videos, so the cache then already has it
+            cached = self.result_cache.get(content_hash, tier)
+            if cached:
+                return ModelSchema(status="success", result=ModelResultSchema(**cached["result"]), task_id=cached["task_id"])
+            return ModelSchema(status="pending", task_id=in_flight_task_id)
 
-        task = predict.delay(video_url)
-        return ModelSchema(status="pending", task_id=str(task.id))
+        try:
+            self.task_client.enqueue(PREDICT_TASK, args=[video_url], kwargs={"content_hash": content_hash, "tier": tier.value, "video_id": video_id}, task_id=task_id)
+        except Exception:
+            # Otherwise re-uploads would attach to a task that was never enqueued until the claim expires
+            self.result_cache.release(content_hash, task_id, tier)
+            raise
+        return ModelSchema(status="pending", task_id=task_id)
 
 
     def get_result(self, task_id: str) -> ModelSchema:
-        result = AsyncResult(id=task_id, app=app)
+        result = self.task_client.get(task_id)
 
         if result.state == 'PENDING':
             return ModelSchema(status="pending", task_id=task_id)
@@ -57,5 +107,25 @@ class ModelInferenceImpl(ModelInference):
             return ModelSchema(status="error", result=result.info, task_id=task_id)
 
 
+    def analyze_batch(self, items: List[dict], tier: AnalysisTier = AnalysisTier.STANDARD) -> BatchSchema:
+        batch_id = self.task_client.enqueue(PREDICT_BATCH_TASK, args=[items], kwargs={"tier": tier.value})
+        return BatchSchema(batch_id=batch_id, status="pending", total=len(items))
+
+
+    def get_batch(self, batch_id: str) -> BatchSchema:
+        result = self.task_client.get(batch_id)
+
+        if result.state == 'PENDING':
+            return BatchSchema(batch_id=batch_id, status="pending")
+        elif result.state == 'PROGRESS':
+            return BatchSchema(batch_id=batch_id, status="processing", **result.info)
+        elif result.state == 'SUCCESS':
+            return BatchSchema(batch_id=batch_id, status="success", **result.result)
+        elif result.state == 'FAILURE':
+            return BatchSchema(batch_id=batch_id, status="failed", error=str(result.info))
+        else:
+            return BatchSchema(batch_id=batch_id, status="error", error=str(result.info))
+
+
 
-model_inference = ModelInferenceImpl()
\ No newline at end of file
+model_inference = ModelInferenceImpl(task_client, result_cache)
\ No newline at end of file
@@ -0,0 +1,73 @@
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from redis import Redis, RedisError
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import PubSub
+from src.core.config import settings
+from src.core.connections.cache.redis_connection import redis_cache
+from src.core.logger.logger import logger
+
+
+TERMINAL_EVENTS = ("result", "failed")
+
+
+class ProgressSubscription:
+    """
+    Events of one task as they are published.
+    """
+
+    def __init__(self, pubsub: PubSub, idle_timeout: float) -> None:
+        self.pubsub = pubsub
+        self.idle_timeout = idle_timeout
+
+    async def __aiter__(self) -> AsyncIterator[Optional[dict]]:
+        """Yield each event, or None after idle_timeout seconds without one."""
+        while True:
+            message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=self.idle_timeout)
+            yield json.loads(message["data"]) if message else None
+
+
+class ProgressChannel:
+    """
+    Task progress events over Redis pub/sub: the worker publishes stage and frame events,
+    the API forwards them to clients. Events are not stored, so a subscriber only sees
+    events published after it subscribed.
+    """
+
+    def __init__(self, client: Redis, async_client: AsyncRedis, enabled: bool = True, idle_timeout: float = 15) -> None:
+        self.client = client
+        self.async_client = async_client
+        self.enabled = enabled
+        self.idle_timeout = idle_timeout
+
+    @staticmethod
+    def _channel(task_id: str) -> str:
+        return f"lookout:progress:{task_id}"
+
+    def publish(self, task_id: str, event: str, **data) -> None:
+        """Publish an event; progress is best effort and never fails the task."""
+        if not self.enabled:
+            return
+        try:
+            self.client.publish(self._channel(task_id), json.dumps({"event": event, **data}))
+        except RedisError as e:
+            logger.warning(f"Failed to publish progress of task {task_id}: {e}")
+
+    @asynccontextmanager
+    async def subscribe(self, task_id: str) -> AsyncIterator[ProgressSubscription]:
+        pubsub = self.async_client.pubsub()
+        await pubsub.subscribe(self._channel(task_id))
+        try:
+            yield ProgressSubscription(pubsub, self.idle_timeout)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+
+progress_channel = ProgressChannel(
+    client=redis_cache.client,
+    async_client=redis_cache.async_client,
+    enabled=settings.progress_events_enabled,
+    idle_timeout=settings.progress_idle_timeout,
+)
@@ -0,0 +1,83 @@
+import json
+from typing import List, Optional
+from redis import Redis
+from src.core.config import settings
+from src.core.connections.cache.redis_connection import redis_cache
+from .tiers import AnalysisTier, tier_profile
+
+
+class ResultCache:
+    """
+    Redis cache of finished analysis results keyed by video content hash, analysis tier
+    and the tier's model version, plus a registry of in-flight tasks used to deduplicate
+    concurrent submissions.
+    """
+
+    def __init__(self, client: Redis, result_ttl: int, in_flight_ttl: int) -> None:
+        self.client = client
+        self.result_ttl = result_ttl
+        self.in_flight_ttl = in_flight_ttl
+
+    def _key(self, kind: str, content_hash: str, tier: Optional[str]) -> str:
+        tier = AnalysisTier(tier or settings.default_analysis_tier)
+        return f"lookout:{kind}:{tier_profile(tier).model_version}:{tier.value}:{content_hash}"
+
+    def _result_key(self, content_hash: str, tier: Optional[str]) -> str:
+        return self._key("result", content_hash, tier)
+
+    def _in_flight_key(self, content_hash: str, tier: Optional[str]) -> str:
+        return self._key("in_flight", content_hash, tier)
+
+    def get(self, content_hash: str, tier: Optional[str] = None) -> Optional[dict]:
+        """Return the cached {"task_id", "result"} entry, if any."""
+        entry = self.client.get(self._result_key(content_hash, tier))
+        return json.loads(entry) if entry else None
+
+    def store(self, content_hash: str, task_id: str, result: dict, tier: Optional[str] = None) -> None:
+        """Store a finished result and clear the in-flight marker."""
+        entry = json.dumps({"task_id": task_id, "result": result})
+        pipe = self.client.pipeline()
+        pipe.set(self._result_key(content_hash, tier), entry, ex=self.result_ttl)
+        pipe.delete(self._in_flight_key(content_hash, tier))
+        pipe.execute()
+
+    def claim(self, content_hash: str, task_id: str, tier: Optional[str] = None) -> Optional[str]:
+        """
+        Register task_id as in flight for the content.
+        Returns the task ID already in flight, or None if the claim succeeded.
+        """
+        key = self._in_flight_key(content_hash, tier)
+        if self.client.set(key, task_id, nx=True, ex=self.in_flight_ttl):
+            return None
+        return self.client.get(key)
+
+    def _videos_key(self, task_id: str) -> str:
+        return f"lookout:videos:{task_id}"
+
+    def attach(self, task_id: str, video_id: int) -> None:
+        """Record a stored video that reuses the in-flight task, so its result is persisted for it too."""
+        pipe = self.client.pipeline()
+        pipe.sadd(self._videos_key(task_id), video_id)
+        pipe.expire(self._videos_key(task_id), self.in_flight_ttl)
+        pipe.execute()
+
+    def attached(self, task_id: str) -> List[int]:
+        """Pop the video IDs attached to task_id."""
+        pipe = self.client.pipeline()
+        pipe.smembers(self._videos_key(task_id))
+        pipe.delete(self._videos_key(task_id))
+        video_ids, _ = pipe.execute()
+        return [int(video_id) for video_id in video_ids]
+
+    def release(self, content_hash: str, task_id: str, tier: Optional[str] = None) -> None:
+        """Drop the in-flight marker if it still belongs to task_id."""
+        key = self._in_flight_key(content_hash, tier)
+        if self.client.get(key) == task_id:
+            self.client.delete(key)
+
+
+result_cache = ResultCache(
+    client=redis_cache.client,
+    result_ttl=settings.result_cache_ttl,
+    in_flight_ttl=settings.in_flight_ttl,
+)
@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+from celery import Celery
+from celery.result import AsyncResult
+from worker.celery_app import app
+
+
+PREDICT_TASK = "worker.celery_tasks.predict"
+PREDICT_BATCH_TASK = "worker.celery_tasks.predict_batch"
+
+
+class TaskClient(ABC):
+    """
+    Abstract client for enqueueing and querying worker tasks.
+    """
+
+    @abstractmethod
+    def enqueue(self, task_name: str, args: Optional[list] = None, kwargs: Optional[dict] = None, task_id: Optional[str] = None) -> str:
+        """
+        Enqueue a task by name and return its id.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, task_id: str) -> AsyncResult:
+        """
+        Get the state and result handle of a task.
+        """
+        pass
+
+
+class CeleryTaskClient(TaskClient):
+    """
+    Task client that addresses worker tasks by name only,
+    so the API process never imports the task module or the models.
+    """
+
+    def __init__(self, app: Celery):
+        self.app = app
+
+    def enqueue(self, task_name: str, args: Optional[list] = None, kwargs: Optional[dict] = None, task_id: Optional[str] = None) -> str:
+        return self.app.send_task(task_name, args=args, kwargs=kwargs, task_id=task_id).id
+
+    def get(self, task_id: str) -> AsyncResult:
+        return AsyncResult(id=task_id, app=self.app)
+
+
+task_client = CeleryTaskClient(app)
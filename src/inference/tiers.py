@@ -0,0 +1,55 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+from src.core.config import settings
+
+
+class AnalysisTier(str, Enum):
+    FAST = "fast"
+    STANDARD = "standard"
+    THOROUGH = "thorough"
+
+
+class TierProfile(BaseModel):
+    """
+    Model artifacts, input resolution and frame budget used by an analysis tier.
+    """
+    model_version: str
+    input_size: int
+    max_frames: int
+
+
+TIER_PROFILES = {
+    AnalysisTier.FAST: TierProfile(
+        model_version=settings.fast_tier_model_version,
+        input_size=settings.fast_tier_input_size,
+        max_frames=settings.fast_tier_max_frames,
+    ),
+    AnalysisTier.STANDARD: TierProfile(
+        model_version=settings.model_version,
+        input_size=380,
+        max_frames=60,
+    ),
+    AnalysisTier.THOROUGH: TierProfile(
+        model_version=settings.model_version,
+        input_size=380,
+        max_frames=settings.thorough_tier_max_frames,
+    ),
+}
+
+
+def tier_profile(tier: Optional[str] = None) -> TierProfile:
+    """
+    Profile of the given tier, the default tier when none is given.
+    """
+    return TIER_PROFILES[AnalysisTier(tier or settings.default_analysis_tier)]
+
+
+def tier_for_plan(subscription_plan: Optional[str], subscription_expiry: Optional[datetime] = None) -> AnalysisTier:
+    """
+    Default tier of a user's subscription plan; an expired subscription counts as free.
+    """
+    if subscription_expiry and subscription_expiry < datetime.utcnow():
+        subscription_plan = "free"
+    return AnalysisTier(settings.analysis_tier_by_plan.get(subscription_plan, settings.default_analysis_tier))
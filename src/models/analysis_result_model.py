@@ -1,15 +1,23 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, ForeignKey, Float
+from sqlalchemy import Integer, String, ForeignKey, Float, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from .base_model import BaseModel
 from .annotations import IDPK, CreatedAt
 
 
 class AnalysisResultModel(BaseModel):
     __tablename__ = "analysis_results"
+    __table_args__ = (UniqueConstraint("task_id", "video_id", name="uq_analysis_results_task_id_video_id"),)
 
     id: Mapped[IDPK]
     video_id: Mapped[Integer] = mapped_column(ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
-    task_id: Mapped[String] = mapped_column(String(100), nullable=False)
-    prediction: Mapped[String] = mapped_column(String(255), nullable=False)
+    task_id: Mapped[String] = mapped_column(String(100), nullable=False, index=True)
+    verdict: Mapped[String] = mapped_column(String(255), nullable=False)
+    real_votes: Mapped[Integer] = mapped_column(Integer, nullable=False)
+    fake_votes: Mapped[Integer] = mapped_column(Integer, nullable=False)
+    total_frames: Mapped[Integer] = mapped_column(Integer, nullable=False)
     confidence: Mapped[Float] = mapped_column(Float,nullable=False)
-    created_at: Mapped[CreatedAt]
\ No newline at end of file
+    tier: Mapped[String] = mapped_column(String(32), nullable=True)
+    model_version: Mapped[String] = mapped_column(String(100), nullable=True)
+    details: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[CreatedAt]
@@ -2,6 +2,7 @@ from contextlib import AbstractAsyncContextManager
 from typing import Callable, List, TypeVar, Type
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from src.schemas.analysis_result_schema import AnalysisResultCreate, AnalysisResultUpdate, AnalysisResultResponse
 from src.utils.model_adapter import model_to_schema
 from src.models.analysis_result_model import AnalysisResultModel
@@ -29,6 +30,13 @@ class AnalysisResultRepository(Repository):
             await session.refresh(analysis_result)
             return model_to_schema(analysis_result, AnalysisResultResponse)
     
+    async def create_if_missing(self, obj: AnalysisResultCreate) -> None:
+        """Create an analysis result unless one exists for the same task and video."""
+        async with self.connection_pool() as session:
+            query = insert(self.model).values(**obj.dict()).on_conflict_do_nothing(index_elements=["task_id", "video_id"])
+            await session.execute(query)
+            await session.commit()
+    
     async def get(self, obj_id: int) -> AnalysisResultResponse:
         """Retrieve an analysis result by ID."""
         async with self.connection_pool() as session:
@@ -85,5 +85,13 @@ class VideoRepository(Repository):
             videos = result.scalars().all()
             return [model_to_schema(video, VideoResponse) for video in videos]
         
+    async def get_by_ids(self, obj_ids: List[int]) -> List[VideoResponse]:
+        """Retrieve videos by IDs in one query."""
+        async with self.connection_pool() as session:
+            query = select(self.model).where(self.model.id.in_(obj_ids))
+            result = await session.execute(query)
+            videos = result.scalars().all()
+            return [model_to_schema(video, VideoResponse) for video in videos]
+        
 video_repository = VideoRepository(postgres.connection_pool_factory(), VideoModel)
 
@@ -15,6 +15,9 @@ class AnalysisResultBase(BaseModel):
     fake_votes: int = Field(..., description="Number of votes for FAKE")
     total_frames: int = Field(..., description="Total number of frames processed")
     confidence: float = Field(..., description="Confidence level of the prediction")
+    tier: Optional[str] = Field(None, description="Analysis tier the result was produced with")
+    model_version: Optional[str] = Field(None, description="Version of the model artifacts that produced the result")
+    details: Optional[dict] = Field(None, description="Remaining fields of the model result (frame budget, timestamps, stage metrics)")
 
 class AnalysisResultCreate(AnalysisResultBase):
     """
@@ -16,3 +16,36 @@ class ModelResultSchema(BaseModel):
     fake_votes: int = Field(..., description="Number of votes for FAKE")
     total_frames: int = Field(..., description="Total number of frames processed")
     confidence: float = Field(..., description="Confidence level of the analysis")
+    frame_budget: Optional[int] = Field(None, description="Maximum number of frames the analysis could use")
+    early_exit: Optional[bool] = Field(None, description="Whether adaptive sampling stopped before the frame budget")
+    tier: Optional[str] = Field(None, description="Analysis tier the result was produced with")
+    model_version: Optional[str] = Field(None, description="Version of the model artifacts that produced the result")
+    timestamps: Optional[List[float]] = Field(None, description="Timestamps in seconds of the keyframes analyzed in keyframe sampling mode")
+    stage_metrics: Optional[dict] = Field(None, description="Per-stage metrics of the analysis")
+
+
+class ProgressEventSchema(BaseModel):
+    event: str = Field(..., description="Event type: fetching, started, frames, round, refill or the final result")
+    task_id: str = Field(..., description="Task ID of the analysis")
+    data: dict = Field(default_factory=dict, description="Event payload; the final result event carries the ModelSchema")
+
+
+class BatchItemSchema(BaseModel):
+    task_id: Optional[str] = Field(None, description="Task ID of this video's analysis within the batch")
+    video_id: Optional[int] = Field(None, description="ID of the stored video")
+    video_url: str = Field(..., description="URL of the video file")
+    status: str = Field(..., description="Status of the video analysis")
+    result: Optional[ModelResultSchema] = Field(None, description="Result of the video analysis")
+    error: Optional[str] = Field(None, description="Error message if the analysis failed")
+
+
+class BatchSchema(BaseModel):
+    batch_id: str = Field(..., description="Batch ID for tracking the analysis")
+    status: str = Field(..., description="Status of the batch")
+    total: Optional[int] = Field(None, description="Number of videos in the batch")
+    completed: int = Field(0, description="Number of videos analyzed successfully")
+    failed: int = Field(0, description="Number of videos that failed")
+    verdicts: dict[str, int] = Field(default_factory=dict, description="Number of videos per verdict")
+    results: Optional[List[BatchItemSchema]] = Field(None, description="Per-video results, once the batch has finished")
+    error: Optional[str] = Field(None, description="Error message if the batch failed")
+    rejected: Optional[List[BatchItemSchema]] = Field(None, description="Uploads that could not be stored and are not part of the batch")
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 import asyncio
-from typing import AsyncGenerator
-from src.schemas.model_schema import ModelSchema
+from uuid import uuid4
+from typing import AsyncGenerator, List, Optional, Tuple
+from src.core.config import settings
+from src.schemas.model_schema import BatchItemSchema, BatchSchema, ModelResultSchema, ModelSchema, ProgressEventSchema
 from src.schemas.video_schema import VideoCreate
 from src.schemas.analysis_result_schema import AnalysisResultCreate, AnalysisResultResponse, AnalysisResultUpdate
 from src.core.storage.storage import Storage
@@ -10,7 +12,10 @@ from src.repo.video_repo import video_repository
 from src.repo.analysis_result_repo import analysis_result_repository
 from .repository import Repository
 from io import BytesIO
+from src.utils.content_hash import HashingReader
 from src.inference.model_inference import ModelInference, model_inference
+from src.inference.progress import TERMINAL_EVENTS, ProgressChannel, progress_channel
+from src.inference.tiers import AnalysisTier
 
 
 
@@ -20,9 +25,9 @@ class ModelUseCase(ABC):
     """
 
     @abstractmethod
-    async def analyze_video(self, user_id: int, file: BytesIO, file_name: str) -> ModelSchema:
+    async def analyze_video(self, user_id: int, file: BytesIO, file_name: str, tier: AnalysisTier = AnalysisTier.STANDARD) -> ModelSchema:
         """
-        Analyze the given data and return the result.
+        Analyze the given data with the given analysis tier and return the result.
         """
         pass
 
@@ -35,12 +40,37 @@ class ModelUseCase(ABC):
         pass
 
 
+    @abstractmethod
+    def stream_result(self, task_id: str) -> AsyncGenerator[Optional[ProgressEventSchema], None]:
+        """
+        Stream progress events of the analysis, ending with a "result" event.
+        Yields None while no events arrive, so the caller can keep the connection alive.
+        """
+        pass
+
+
+    @abstractmethod
+    async def analyze_batch(self, user_id: int, files: List[Tuple[BytesIO, str]], video_ids: List[int], tier: AnalysisTier = AnalysisTier.STANDARD) -> BatchSchema:
+        """
+        Store the uploaded files and analyze them together with the user's stored videos in one batch.
+        """
+        pass
+
+
+    @abstractmethod
+    async def get_batch(self, batch_id: str) -> BatchSchema:
+        """
+        Get the progress and results of a batch.
+        """
+        pass
+
+
 class ModelUseCaseImpl(ModelUseCase):
     """
     Implementation of model use cases.
     """
 
-    def __init__(self, storage: Storage, video_repository: Repository, analysis_result_repository: Repository, model_inference: ModelInference):
+    def __init__(self, storage: Storage, video_repository: Repository, analysis_result_repository: Repository, model_inference: ModelInference, progress_channel: ProgressChannel):
         """
         Initialize the model use case with storage and repositories.
         """
@@ -48,23 +78,122 @@ class ModelUseCaseImpl(ModelUseCase):
         self.video_repository = video_repository
         self.analysis_result_repository = analysis_result_repository
         self.model_inference = model_inference
+        self.progress_channel = progress_channel
 
     
-    async def analyze_video(self, user_id: int, file: BytesIO, file_name: str) -> ModelSchema:
-        url = await self.storage.upload(file, file_name)
-        video = VideoCreate(user_id=user_id, file_url=url)
-        await self.video_repository.create(video)
-        return await asyncio.to_thread(self.model_inference.analyze_video, url)
+    async def analyze_video(self, user_id: int, file: BytesIO, file_name: str, tier: AnalysisTier = AnalysisTier.STANDARD) -> ModelSchema:
+        reader = HashingReader(file)
+        url = await self.storage.upload(reader, file_name)
+        video = await self.video_repository.create(VideoCreate(user_id=user_id, file_url=url))
+        result = await asyncio.to_thread(self.model_inference.analyze_video, url, reader.hexdigest(), tier, video.id)
+        if result.status == "success":
+            # Served from the content-hash cache: the cached result is linked to this video
+            # under its own task ID, so every task ID has exactly one result row
+            result.task_id = str(uuid4())
+            await self.analysis_result_repository.create_if_missing(record_from_result(result.task_id, video.id, result.result))
+        return result
 
     async def get_result(self, task_id: str) -> ModelSchema:
+        # Finished results are read from Postgres; the result backend only holds in-flight
+        # tasks and results the worker has not persisted yet
+        stored = await self.analysis_result_repository.get_all_by_fields(task_id=task_id)
+        if len(stored) > 1:
+            raise ValueError(f"Task {task_id} has {len(stored)} results; batch results are served by /model/analyze/batch/{task_id}")
+        if stored:
+            return ModelSchema(status="success", result=result_from_record(stored[0]), task_id=task_id)
         result = await asyncio.to_thread(self.model_inference.get_result, task_id)
         if not result:
             raise ValueError("Result not found")
         return result
+
+    async def stream_result(self, task_id: str) -> AsyncGenerator[Optional[ProgressEventSchema], None]:
+        # Subscribe before checking the state so the final event cannot slip in between
+        async with self.progress_channel.subscribe(task_id) as subscription:
+            result = await self.get_result(task_id)
+            if result.status not in FINISHED_STATUSES:
+                async for event in subscription:
+                    if event is None:
+                        # No events for a while: the task may have finished unseen (e.g. the worker died)
+                        result = await self.get_result(task_id)
+                        if result.status in FINISHED_STATUSES:
+                            break
+                        yield None
+                    elif event["event"] in TERMINAL_EVENTS:
+                        result = result_from_event(task_id, event)
+                        break
+                    else:
+                        yield ProgressEventSchema(event=event.pop("event"), task_id=task_id, data=event)
+        yield ProgressEventSchema(event="result", task_id=task_id, data=result.model_dump())
+
+    async def analyze_batch(self, user_id: int, files: List[Tuple[BytesIO, str]], video_ids: List[int], tier: AnalysisTier = AnalysisTier.STANDARD) -> BatchSchema:
+        if not files and not video_ids:
+            raise ValueError("No videos to analyze")
+        if len(files) + len(video_ids) > settings.batch_max_videos:
+            raise ValueError(f"A batch can contain at most {settings.batch_max_videos} videos")
+
+        # Stored videos are fetched in one query
+        videos = {video.id: video for video in await self.video_repository.get_by_ids(video_ids)} if video_ids else {}
+        items = []
+        for video_id in video_ids:
+            video = videos.get(video_id)
+            if not video or video.user_id != user_id:
+                raise ValueError(f"Video {video_id} not found")
+            items.append({"video_id": video.id, "video_url": video.file_url})
+
+        # Загрузки в S3 идут параллельно, но не больше batch_upload_concurrency одновременно
+        semaphore = asyncio.Semaphore(settings.batch_upload_concurrency)
+
+        async def store(file: BytesIO, file_name: str) -> dict:
+            async with semaphore:
+                reader = HashingReader(file)
+                url = await self.storage.upload(reader, file_name)
+                video = await self.video_repository.create(VideoCreate(user_id=user_id, file_url=url))
+                return {"video_id": video.id, "video_url": url, "content_hash": reader.hexdigest()}
+
+        # A failed upload does not cancel the others: the stored videos are analyzed
+        # and the failed uploads are reported back with the batch
+        stored = await asyncio.gather(*(store(file, file_name) for file, file_name in files), return_exceptions=True)
+        errors = [outcome for outcome in stored if isinstance(outcome, Exception)]
+        items += [outcome for outcome in stored if not isinstance(outcome, Exception)]
+        if not items:
+            raise errors[0]
+
+        batch = await asyncio.to_thread(self.model_inference.analyze_batch, items, tier)
+        if errors:
+            batch.rejected = [
+                BatchItemSchema(video_url=file_name, status="failed", error=str(outcome))
+                for (_, file_name), outcome in zip(files, stored)
+                if isinstance(outcome, Exception)
+            ]
+        return batch
+
+    async def get_batch(self, batch_id: str) -> BatchSchema:
+        return await asyncio.to_thread(self.model_inference.get_batch, batch_id)
         
         
         
 
+FINISHED_STATUSES = ("success", "failed")
+
+
+def record_from_result(task_id: str, video_id: int, result: ModelResultSchema) -> AnalysisResultCreate:
+    data = result.model_dump()
+    columns = set(AnalysisResultCreate.model_fields) - {"video_id", "task_id", "details"}
+    details = {key: value for key, value in data.items() if key not in columns}
+    return AnalysisResultCreate(video_id=video_id, task_id=task_id, details=details, **{key: data[key] for key in columns})
+
+
+def result_from_record(record: AnalysisResultResponse) -> ModelResultSchema:
+    fields = record.model_dump(include=set(ModelResultSchema.model_fields))
+    return ModelResultSchema(**fields, **(record.details or {}))
+
+
+def result_from_event(task_id: str, event: dict) -> ModelSchema:
+    if event["event"] == "result":
+        return ModelSchema(status="success", result=ModelResultSchema(**event["result"]), task_id=task_id)
+    return ModelSchema(status="failed", result=event["error"], task_id=task_id)
+
+
 async def get_model_use_case() -> AsyncGenerator[ModelUseCase, None]:
-    yield ModelUseCaseImpl(s3_storage, video_repository, analysis_result_repository, model_inference)
+    yield ModelUseCaseImpl(s3_storage, video_repository, analysis_result_repository, model_inference, progress_channel)
 
@@ -0,0 +1,20 @@
+import hashlib
+
+
+class HashingReader:
+    """
+    File-like wrapper that hashes the content as it is read,
+    so the digest is ready once the stream has been consumed (e.g. uploaded).
+    """
+
+    def __init__(self, file, algorithm: str = "sha256"):
+        self._file = file
+        self._hash = hashlib.new(algorithm)
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._file.read(size)
+        self._hash.update(chunk)
+        return chunk
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
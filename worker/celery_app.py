@@ -13,13 +13,16 @@ app = Celery(
 app.conf.update(
     task_routes={
         'worker.celery_tasks.predict': {'queue': 'video_analysis'},
+        'worker.celery_tasks.predict_batch': {'queue': 'video_analysis'},
     },
     task_default_queue='video_analysis',
     task_default_exchange='video_analysis',
     task_default_routing_key='video_analysis',
     task_always_eager=False,
     task_eager_propagates=False,
-    worker_concurrency=1,
+    worker_concurrency=settings.worker_processes,
+    worker_prefetch_multiplier=1,
+    result_expires=settings.result_backend_ttl,
 )
 
 
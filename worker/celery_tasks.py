@@ -1,150 +1,453 @@
 from .celery_app import app
-import torch
-import torchvision.transforms as transforms
-import torchvision.models as models
-import cv2
+from src.core.config import settings
+from src.inference.result_cache import result_cache
+from src.inference.progress import progress_channel
+from src.inference.tiers import AnalysisTier, tier_profile
+from .sampling import (
+    coarse_to_fine_rounds,
+    iter_frames,
+    iter_frames_at,
+    probe_frame_count,
+    probe_keyframes,
+    sample_frame_indices,
+)
+from .pipeline import FramePipeline
+from .preprocessing import FramePreprocessor
+from .features import handcrafted_features
+from .embedding_cache import create_embedding_cache, frame_digest
+from .dedupe import FrameDeduplicator, refill_indices
+from .video_cache import create_video_cache
+from .result_store import create_result_store
+from .memory import FrameBuffer, peak_rss, reset_peak_rss
+from .engine import configure_torch_threads, create_engine
+from .registry import registry
+from billiard.process import current_process
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
+from celery.utils.log import get_task_logger
+from collections import namedtuple
+from contextlib import contextmanager
+from uuid import uuid4
+import gc
 import numpy as np
-from scipy.stats import variation
-
-
-class MLPClassifierV2(torch.nn.Module):
-    def __init__(self, input_dim=1796):
-        super(MLPClassifierV2, self).__init__()
-        self.dropout1 = torch.nn.Dropout(0.5)
-        self.dropout2 = torch.nn.Dropout(0.3)
-        self.dropout3 = torch.nn.Dropout(0.1)
-        self.model = torch.nn.Sequential(
-            torch.nn.Linear(input_dim, 1024),
-            torch.nn.BatchNorm1d(1024),
-            torch.nn.ReLU(),
-            self.dropout1,
-            torch.nn.Linear(1024, 512),
-            torch.nn.BatchNorm1d(512),
-            torch.nn.ReLU(),
-            self.dropout2,
-            torch.nn.Linear(512, 128),
-            torch.nn.BatchNorm1d(128),
-            torch.nn.ReLU(),
-            self.dropout3,
-            torch.nn.Linear(128, 1)
-        )
-
-    def forward(self, x):
-        return self.model(x)
-
-transform = transforms.Compose([
-    transforms.ToPILImage(),
-    transforms.Resize((380, 380)),
-    transforms.ToTensor(),
-    transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
-])
-
-def extract_frames(video_path, max_frames=60):
-    cap = cv2.VideoCapture(video_path)
-    frames = []
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    frame_idxs = np.linspace(0, frame_count - 1, max_frames, dtype=int)
-    for idx in frame_idxs:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if ret:
-            frames.append(frame)
-    cap.release()
-    return frames
-
-def calculate_eyeblink_rate(frames):
-    return np.random.uniform(0.1, 0.5)
-
-def calculate_head_pose_variance(frames):
-    return np.random.uniform(0.05, 0.2)
-
-def calculate_texture_variance(frames):
-    textures = []
-    for frame in frames:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        textures.append(variation(gray))
-    return np.mean(textures)
-
-def calculate_blur_score(frames):
-    blurs = []
-    for frame in frames:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurs.append(cv2.Laplacian(gray, cv2.CV_64F).var())
-    return np.mean(blurs)
-
-
-def load_models():
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    effnet = models.efficientnet_b4(weights=models.EfficientNet_B4_Weights.DEFAULT)
-    effnet.classifier = torch.nn.Identity()
-    effnet = effnet.to(device).eval()
-
-    mlp_model = MLPClassifierV2(input_dim=1796)
-    mlp_model.load_state_dict(torch.load('models/best_model.pth', map_location=device))
-    mlp_model = mlp_model.to(device).eval()
-
-    return {'effnet': effnet, 'mlp': mlp_model, 'device': device}
-
-
-loaded_models = load_models()
-
-@app.task
-def predict(video_path: str, max_frames=60):
-    effnet = loaded_models['effnet']
-    mlp_model = loaded_models['mlp']
-    device = loaded_models['device']
-
-
-    # Извлечение кадров
-    frames = extract_frames(video_path, max_frames)
-    if len(frames) == 0:
-        raise ValueError("No frames extracted from video.")
-    
 
-    predictions = []
 
-    # Обработка каждого кадра
-    for idx, frame in enumerate(frames):
-        
-        try:
-            input_tensor = transform(frame).unsqueeze(0).to(device)
-            with torch.no_grad():
-                effnet_feature = effnet(input_tensor).squeeze().cpu().numpy()
+logger = get_task_logger(__name__)
 
-            eyeblink_rate = calculate_eyeblink_rate([frame])
-            head_pose_var = calculate_head_pose_variance([frame])
-            texture_var = calculate_texture_variance([frame])
-            blur_score = calculate_blur_score([frame])
 
+default_preprocessor = FramePreprocessor(size=380)
 
-            final_feature = np.concatenate([effnet_feature, np.array([eyeblink_rate, head_pose_var, texture_var, blur_score])])
-            final_feature = torch.tensor(final_feature, dtype=torch.float32).unsqueeze(0).to(device)
+PreparedBatch = namedtuple('PreparedBatch', ['input_tensor', 'handcrafted', 'embeddings', 'missing', 'keys'])
 
-            with torch.no_grad():
-                output = mlp_model(final_feature)
-                prob = torch.sigmoid(output).item()
 
-            pred = 1 if prob >= 0.5 else 0
-            predictions.append(pred)
+def preprocess_frames(frames, embedding_cache=None, preprocessor=None, handcrafted=None):
+    """
+    Подготовка микро-батча кадров: ручные признаки для всех кадров (или уже готовые handcrafted),
+    входной тензор EfficientNet - только для кадров, которых нет в кеше эмбеддингов.
+    """
+    preprocessor = preprocessor or default_preprocessor
+    # Ключ кеша - хеш уже уменьшенного кадра, который и пойдёт в backbone
+    resized = [preprocessor.resize(frame) for frame in frames]
+    keys = [frame_digest(frame) for frame in resized] if embedding_cache else None
+    embeddings = [embedding_cache.get(key) for key in keys] if keys else [None] * len(frames)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    input_tensor = preprocessor.to_tensor([resized[i] for i in missing]) if missing else None
+    if handcrafted is None:
+        handcrafted = handcrafted_features(frames)
+    return PreparedBatch(input_tensor, handcrafted, embeddings, missing, keys)
+
+
+def embed_frames(engine, prepared, embedding_cache=None):
+    """
+    Эмбеддинги батча: из кеша или через EfficientNet, затем сохраняются в кеш.
+    Возвращает признаки формы (B, 1796).
+    """
+    embeddings = list(prepared.embeddings)
+    if prepared.missing:
+        computed = engine.embed(prepared.input_tensor)
+        for i, embedding in zip(prepared.missing, computed):
+            embeddings[i] = embedding
+            if embedding_cache:
+                embedding_cache.put(prepared.keys[i], embedding)
+    return np.concatenate([np.stack(embeddings), prepared.handcrafted], axis=1)
 
-        except Exception as e:
-            continue  # Пропускаем ошибочный кадр и продолжаем обработку
 
-    # Подсчёт итоговых результатов
-    predictions = np.array(predictions)
-    real_votes = np.sum(predictions == 0)
-    fake_votes = np.sum(predictions == 1)
-    verdict = "REAL" if real_votes >= fake_votes else "FAKE"
-    confidence = f"{max(real_votes, fake_votes) / len(predictions) * 100:.2f}%"
+def score_frames(engine, features):
+    """
+    Оценка матрицы признаков (N, 1796) одним вызовом MLP.
+    Возвращает вероятности FAKE для каждого кадра, форма (N,).
+    """
+    return engine.score(features)
 
 
-    if isinstance(confidence, str) and confidence.endswith('%'):
-        confidence = float(confidence.strip('%'))
+def aggregate_votes(probs, vote_mode="hard", threshold=0.5, weights=None):
+    """
+    Итоговый вердикт по вероятностям кадров.
+    hard - голосование большинством, soft - по средней вероятности.
+    weights - число кадров, которое представляет каждая оценка (после дедупликации).
+    """
+    if vote_mode not in ("hard", "soft"):
+        raise ValueError(f"Unknown vote mode: {vote_mode}")
+
+    weights = np.ones(len(probs), dtype=int) if weights is None else np.asarray(weights)
+    predictions = probs >= threshold
+    total_frames = int(weights.sum())
+    fake_votes = int(weights[predictions].sum())
+    real_votes = total_frames - fake_votes
+
+    if vote_mode == "soft":
+        fake_prob = float(np.average(probs, weights=weights))
+        verdict = "FAKE" if fake_prob >= threshold else "REAL"
+        confidence = max(fake_prob, 1 - fake_prob) * 100
+    else:
+        verdict = "REAL" if real_votes >= fake_votes else "FAKE"
+        confidence = max(real_votes, fake_votes) / total_frames * 100
 
     return {
         'verdict': verdict,
-        'real_votes': int(real_votes),
-        'fake_votes': int(fake_votes),
-        'total_frames': len(predictions),
-        'confidence': confidence
+        'real_votes': real_votes,
+        'fake_votes': fake_votes,
+        'total_frames': total_frames,
+        'confidence': round(confidence, 2)
     }
+
+
+def verdict_is_settled(probs, vote_mode="hard", confidence=None, threshold=0.5, weights=None):
+    """
+    Последовательная проверка по границе Хёфдинга: доля голосов FAKE
+    (или средняя вероятность для soft) отличается от порога больше,
+    чем допускает случайность выборки при заданном уровне доверия.
+    Размер выборки - число уникальных кадров, а не их суммарный вес.
+    """
+    confidence = confidence or settings.adaptive_confidence
+    if len(probs) == 0:
+        return False
+    values = probs if vote_mode == "soft" else probs >= threshold
+    margin = abs(float(np.average(values, weights=weights)) - threshold)
+    bound = np.sqrt(np.log(2 / (1 - confidence)) / (2 * len(probs)))
+    return margin > bound
+
+
+def open_embedding_cache(engine, shard=0, shards=1):
+    return create_embedding_cache(
+        input_size=engine.input_size,
+        precision=engine.precision,
+        model_version=engine.model_version,
+        dim=engine.embedding_dim,
+        shard=shard,
+        shards=shards,
+    )
+
+
+def load_models(engine=None, precision=None, profile=None, shard=0, shards=1):
+    profile = profile or tier_profile()
+    engine = create_engine(engine, precision, profile.model_version, profile.input_size)
+    return {
+        'engine': engine,
+        'embedding_cache': open_embedding_cache(engine, shard, shards),
+        'preprocessor': FramePreprocessor(size=engine.input_size),
+    }
+
+
+# Модели по (версия модели, размер входа); заполняется хуком worker_init, а не при импорте модуля
+loaded_models = {}
+pool_processes = 1
+pool_index = 0
+
+
+def init_models(tier=None):
+    """
+    Загрузка моделей тарифа анализа один раз на процесс
+    (тарифы не из preload_analysis_tiers и вне воркера Celery - при первом вызове).
+    """
+    profile = tier_profile(tier)
+    key = (profile.model_version, profile.input_size)
+    if key not in loaded_models:
+        loaded_models[key] = load_models(profile=profile, shard=pool_index, shards=pool_processes)
+    return loaded_models[key]
+
+
+def setup_worker_process(processes, index=0):
+    """
+    Настройка дочернего процесса после форка: веса моделей уже есть (copy-on-write),
+    делятся потоки PyTorch и открывается свой шард дискового кеша эмбеддингов.
+    """
+    global pool_processes, pool_index
+    pool_processes, pool_index = processes, index
+    configure_torch_threads(processes)
+    for models in loaded_models.values():
+        if models['embedding_cache'] is not None:
+            models['embedding_cache'] = open_embedding_cache(models['engine'], index, processes)
+
+
+@worker_init.connect
+def on_worker_init(sender=None, **kwargs):
+    # Модели загружаются в родительском процессе воркера, до запуска пула.
+    # gc.freeze убирает их объекты из обхода сборщика мусора, чтобы дочерние
+    # процессы не копировали страницы с весами при сборке мусора.
+    global pool_processes
+    pool_processes = sender.concurrency
+    for tier in {resolve_tier(tier) for tier in settings.preload_analysis_tiers}:
+        init_models(tier)
+    gc.freeze()
+
+
+@worker_process_init.connect
+def on_worker_process_init(**kwargs):
+    setup_worker_process(pool_processes, current_process().index)
+
+
+def resolve_tier(tier=None):
+    """
+    Тариф анализа; если версия модели тарифа не опубликована в реестре - тариф по умолчанию.
+    """
+    default = AnalysisTier(settings.default_analysis_tier)
+    tier = AnalysisTier(tier or default)
+    if tier != default and not registry.published(tier_profile(tier).model_version):
+        logger.warning("Model version of the %s tier is not published, falling back to %s", tier.value, default.value)
+        return default
+    return tier
+
+
+def ran_requested_tier(tier, result):
+    """
+    Результат получен моделью запрошенного тарифа. Если воркер откатился на тариф по умолчанию,
+    результат не кешируется: ключ кеша включает версию модели запрошенного тарифа.
+    """
+    return result['tier'] == AnalysisTier(tier or settings.default_analysis_tier).value
+
+
+def report_nothing(event, **data):
+    pass
+
+
+def run_prediction(video_path, max_frames=None, vote_mode=None, adaptive=None, tier=None, sampling_mode=None, progress=None):
+    """
+    Анализ одного локального видео.
+    progress(event, **data) получает события стадий и число обработанных кадров.
+    """
+    progress = progress or report_nothing
+    peak_rss_reset = reset_peak_rss()
+    tier = resolve_tier(tier)
+    max_frames = max_frames or tier_profile(tier).max_frames
+    models = init_models(tier)
+    engine = models['engine']
+    preprocessor = models['preprocessor']
+    vote_mode = vote_mode or settings.vote_mode
+    adaptive = settings.adaptive_sampling if adaptive is None else adaptive
+    keyframes = (sampling_mode or settings.frame_sampling_mode) == "keyframe"
+
+
+    embedding_cache = models['embedding_cache']
+    cache_stats = {'hits': 0, 'misses': 0}
+
+    # Кадры живут только в кольцевом буфере рабочего разрешения, слот освобождается после предобработки
+    pipeline = FramePipeline()
+    buffer = FrameBuffer(pipeline.frames_in_flight, min_side=preprocessor.size) if settings.bounded_extraction else None
+
+    def fill(frames):
+        # Ручные признаки MLP обучен на кадрах исходного разрешения: они считаются до уменьшения
+        # кадра в буфер, дальше по конвейеру идут слот буфера и четыре числа
+        for frame in frames:
+            features = handcrafted_features([frame])[0]
+            yield buffer.put(frame), features
+
+    def preprocess(items):
+        if not buffer:
+            return preprocess_frames(items, embedding_cache, preprocessor)
+        frames = [frame for frame, _ in items]
+        try:
+            return preprocess_frames(frames, embedding_cache, preprocessor, np.stack([features for _, features in items]))
+        finally:
+            buffer.release(frames)
+
+    def infer(prepared):
+        cache_stats['misses'] += len(prepared.missing)
+        cache_stats['hits'] += len(prepared.embeddings) - len(prepared.missing)
+        features = embed_frames(engine, prepared, embedding_cache)
+        progress('frames', processed=cache_stats['hits'] + cache_stats['misses'], frame_budget=max_frames)
+        return features
+
+    # По ключевым кадрам, ближайшим к сетке: каждый кадр - одно декодирование, время кадров идёт в результат
+    timestamps = None
+    if keyframes:
+        frame_idxs, timestamps = probe_keyframes(video_path, max_frames)
+    elif adaptive:
+        frame_idxs = sample_frame_indices(probe_frame_count(video_path), max_frames)
+
+    # В адаптивном режиме кадры оцениваются раундами от грубой сетки к точной
+    if adaptive:
+        rounds = coarse_to_fine_rounds(len(frame_idxs), settings.adaptive_min_frames)
+    elif keyframes:
+        rounds = [np.arange(len(frame_idxs))]
+    else:
+        rounds = None
+    if rounds is None:
+        sources = [iter_frames(video_path, max_frames, sampling_mode)]
+    else:
+        read_mode = "keyframe" if keyframes else sampling_mode
+        sources = [iter_frames_at(video_path, frame_idxs[positions], read_mode) for positions in rounds]
+
+    # Почти одинаковые кадры отсеиваются ещё на стадии декодирования
+    deduper = FrameDeduplicator() if settings.dedupe_enabled else None
+
+    def score_round(frames, probs):
+        if deduper:
+            frames = deduper.filter(frames)
+        if buffer:
+            frames = fill(frames)
+        # Декодирование, предобработка и EfficientNet идут параллельно в конвейере
+        batches = pipeline.run(frames, preprocess, infer)
+        if not batches:
+            return probs
+        # Один вызов MLP на все кадры раунда
+        return np.concatenate([probs, score_frames(engine, np.concatenate(batches))])
+
+    probs = np.empty(0, dtype=np.float32)
+    early_exit = False
+    progress('started', tier=tier.value, model_version=engine.model_version, frame_budget=max_frames, rounds=len(sources))
+    processed = []
+    for round_idx, frames in enumerate(sources):
+        probs = score_round(frames, probs)
+        if rounds is not None:
+            processed.append(rounds[round_idx])
+        weights = deduper.weights if deduper else None
+        settled = adaptive and round_idx < len(sources) - 1 and verdict_is_settled(probs, vote_mode, weights=weights)
+        progress('round', round=round_idx, scored_frames=len(probs), settled=bool(settled))
+        if settled:
+            early_exit = True
+            break
+
+    # Освободившийся бюджет можно потратить на кадры между исходными точками
+    refill_frames = 0
+    if deduper and settings.dedupe_refill and deduper.suppressed and not early_exit and not keyframes:
+        extra_idxs = refill_indices(probe_frame_count(video_path), max_frames, deduper.suppressed)
+        refill_frames = len(extra_idxs)
+        progress('refill', frames=refill_frames)
+        probs = score_round(iter_frames_at(video_path, extra_idxs), probs)
+
+    if len(probs) == 0:
+        raise ValueError("No frames extracted from video.")
+
+    result = aggregate_votes(probs, vote_mode, weights=deduper.weights if deduper else None)
+    result.update(frame_budget=max_frames, early_exit=early_exit, tier=tier.value, model_version=engine.model_version)
+    if timestamps is not None:
+        result['timestamps'] = [round(float(t), 3) for t in np.sort(timestamps[np.concatenate(processed)])]
+
+    stage_metrics = {'memory': {'peak_rss': peak_rss(), 'peak_rss_reset': peak_rss_reset}}
+    if buffer:
+        stage_metrics['memory'].update(frame_buffer_bytes=buffer.nbytes, working_size=buffer.size)
+    if embedding_cache:
+        lookups = cache_stats['hits'] + cache_stats['misses']
+        cache_stats['hit_rate'] = round(cache_stats['hits'] / lookups, 4) if lookups else 0.0
+        stage_metrics['embedding_cache'] = cache_stats
+    if deduper:
+        stage_metrics['dedupe'] = {
+            'unique_frames': len(deduper.weights),
+            'suppressed_frames': deduper.suppressed,
+            'refill_frames': refill_frames,
+        }
+    result['stage_metrics'] = stage_metrics
+    return result
+
+
+video_cache = create_video_cache()
+result_store = create_result_store()
+
+
+def persist_result(task_id, video_id, result):
+    """
+    Постановка результата в очередь записи в analysis_results; без video_id результат не сохраняется.
+    """
+    if result_store is not None and video_id is not None:
+        result_store.add(task_id, video_id, result)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def on_worker_shutdown(**kwargs):
+    # Дописываем накопленные результаты до выхода процесса
+    if result_store is not None:
+        result_store.flush()
+
+
+@contextmanager
+def local_video(video_url, content_hash=None):
+    """
+    Локальная копия видео из кеша воркера: повторные анализы не скачивают его заново.
+    """
+    if video_cache is None:
+        yield video_url
+        return
+    with video_cache.fetch(video_url, content_hash) as path:
+        yield path
+
+
+@app.task(bind=True)
+def predict(self, video_path: str, max_frames=None, vote_mode=None, adaptive=None, content_hash=None, tier=None, sampling_mode=None, video_id=None):
+    """
+    Анализ видео; ход выполнения публикуется событиями в канал прогресса задачи,
+    последнее событие - result или failed. Результат сохраняется в analysis_results для video_id.
+    """
+    task_id = self.request.id
+
+    def progress(event, **data):
+        progress_channel.publish(task_id, event, **data)
+
+    try:
+        progress('fetching')
+        with local_video(video_path, content_hash) as local_path:
+            result = run_prediction(local_path, max_frames, vote_mode, adaptive, tier, sampling_mode, progress)
+    except Exception as e:
+        if content_hash:
+            result_cache.release(content_hash, task_id, tier)
+        progress('failed', error=str(e))
+        raise
+
+    persist_result(task_id, video_id, result)
+    if content_hash:
+        if ran_requested_tier(tier, result):
+            result_cache.store(content_hash, task_id, result, tier)
+        else:
+            result_cache.release(content_hash, task_id, tier)
+        # Видео, загруженные, пока задача шла, получают свою строку с тем же результатом
+        # под своим id, чтобы у каждого task_id была ровно одна строка
+        for attached_video_id in result_cache.attached(task_id):
+            persist_result(str(uuid4()), attached_video_id, result)
+    progress('result', result=result)
+    return result
+
+
+@app.task(bind=True)
+def predict_batch(self, items, tier=None):
+    """
+    Пакетный анализ: видео обрабатываются по очереди в одном процессе с уже загруженными моделями.
+    Прогресс (счётчики и вердикты) публикуется в состоянии PROGRESS после каждого видео.
+    Каждое видео получает свой task_id (он есть в записи пакета), под ним результат
+    сохраняется в analysis_results и отдаётся через /model/result/{task_id}.
+    """
+    progress = {'total': len(items), 'completed': 0, 'failed': 0, 'verdicts': {'REAL': 0, 'FAKE': 0}}
+    results = []
+    for item in items:
+        entry = {'task_id': str(uuid4()), 'video_id': item.get('video_id'), 'video_url': item['video_url']}
+        content_hash = item.get('content_hash')
+        cached = result_cache.get(content_hash, tier) if content_hash else None
+        try:
+            if cached:
+                result = cached['result']
+            else:
+                with local_video(item['video_url'], content_hash) as local_path:
+                    result = run_prediction(local_path, tier=tier)
+        except Exception as e:
+            entry.update(status='failed', error=str(e))
+            progress['failed'] += 1
+        else:
+            if content_hash and not cached and ran_requested_tier(tier, result):
+                result_cache.store(content_hash, entry['task_id'], result, tier)
+            persist_result(entry['task_id'], item.get('video_id'), result)
+            entry.update(status='success', result=result)
+            progress['completed'] += 1
+            progress['verdicts'][result['verdict']] += 1
+        results.append(entry)
+        self.update_state(state='PROGRESS', meta=progress)
+
+    return dict(progress, results=results)
@@ -0,0 +1,208 @@
+import math
+import os
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+from src.core.config import settings
+
+
+DECODERS = ("opencv", "pyav")
+READ_MODES = ("seek", "sequential", "keyframe")
+
+
+def iter_positions_seek(cap, frame_idxs):
+    """
+    Чтение кадров через seek на каждый индекс, пары (позиция в frame_idxs, кадр).
+    """
+    for position, idx in enumerate(frame_idxs):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = cap.read()
+        if ret:
+            yield position, frame
+
+
+def iter_positions_sequential(cap, frame_idxs, start=0):
+    """
+    Однократный проход по потоку от кадра start: grab() для пропускаемых кадров,
+    retrieve() только для нужных, пары (позиция в frame_idxs, кадр).
+    frame_idxs должны быть отсортированы.
+    """
+    current = start - 1
+    frame = None
+    for position, idx in enumerate(frame_idxs):
+        while current < idx:
+            if not cap.grab():
+                return
+            current += 1
+            frame = None
+        if frame is None:
+            ret, frame = cap.retrieve()
+            if not ret:
+                frame = None
+                continue
+        yield position, frame
+
+
+class VideoDecoder(ABC):
+    """
+    Источник кадров одного видео.
+    """
+
+    frame_count: int
+    fps: float
+
+    def keyframes(self):
+        """
+        Индекс ключевых кадров контейнера: (индексы кадров, время в секундах) или None, если недоступен.
+        """
+        return None
+
+    @abstractmethod
+    def read(self, frame_idxs, mode="seek"):
+        """
+        Кадры BGR uint8 по отсортированным индексам, пары (позиция в frame_idxs, кадр).
+        mode: seek - seek на каждый индекс, sequential - один проход от первого индекса,
+        keyframe - ближайший предшествующий ключевой кадр вместо точного.
+        """
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class OpenCVDecoder(VideoDecoder):
+    """
+    cv2.VideoCapture: декодирование в одном потоке, число кадров из метаданных контейнера.
+    Режим keyframe не поддерживается и читает точные кадры через seek.
+    """
+
+    def __init__(self, video_path):
+        self.cap = cv2.VideoCapture(video_path)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+
+    def read(self, frame_idxs, mode="seek"):
+        if mode != "sequential":
+            return iter_positions_seek(self.cap, frame_idxs)
+        start = int(frame_idxs[0]) if len(frame_idxs) else 0
+        if start > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        return iter_positions_sequential(self.cap, frame_idxs, start)
+
+    def close(self):
+        self.cap.release()
+
+
+class PyAVDecoder(VideoDecoder):
+    """
+    FFmpeg через PyAV с многопоточным декодированием кодека (frame + slice threading).
+    Число кадров - из заголовка потока, а если его нет - подсчётом пакетов без декодирования.
+    Индекс кадра определяется по pts (постоянная частота кадров, как и у OpenCV).
+    """
+
+    def __init__(self, video_path, threads=None):
+        import av
+
+        self.container = av.open(video_path)
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.stream.codec_context.thread_count = threads or decoder_threads()
+        self.rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(self.rate)
+        self.start_pts = self.stream.start_time or 0
+        self._packets = None
+        self.frame_count = self.stream.frames or self._scan_packets()[0]
+
+    def _scan_packets(self):
+        """
+        Один проход demux без декодирования: (число пакетов, pts ключевых кадров).
+        """
+        if self._packets is None:
+            count = 0
+            keyframe_pts = []
+            for packet in self.container.demux(self.stream):
+                if not packet.size:
+                    continue
+                count += 1
+                if packet.is_keyframe and packet.pts is not None:
+                    keyframe_pts.append(packet.pts)
+            self.container.seek(self.start_pts, stream=self.stream)
+            self._packets = (count, sorted(keyframe_pts))
+        return self._packets
+
+    def keyframes(self):
+        offsets = (np.array(self._scan_packets()[1], dtype=np.int64) - self.start_pts) * float(self.stream.time_base)
+        return np.rint(offsets * self.fps).astype(int), offsets
+
+    def _index(self, frame):
+        return round(float((frame.pts - self.start_pts) * self.stream.time_base * self.rate))
+
+    def _seek(self, idx):
+        # seek к ближайшему ключевому кадру не позже idx
+        self.container.seek(self.start_pts + math.ceil(int(idx) / self.rate / self.stream.time_base), stream=self.stream)
+
+    def read(self, frame_idxs, mode="seek"):
+        if mode == "sequential":
+            yield from self._read_sequential(frame_idxs)
+        elif mode == "keyframe":
+            yield from self._read_keyframes(frame_idxs)
+        else:
+            for position, idx in enumerate(frame_idxs):
+                self._seek(idx)
+                for frame in self.container.decode(self.stream):
+                    if self._index(frame) >= idx:
+                        yield position, frame.to_ndarray(format="bgr24")
+                        break
+
+    def _read_sequential(self, frame_idxs):
+        if not len(frame_idxs):
+            return
+        if frame_idxs[0] > 0:
+            self._seek(frame_idxs[0])
+        position = 0
+        for frame in self.container.decode(self.stream):
+            current = self._index(frame)
+            image = None
+            # Пропущенные индексы (кадры с неравномерными pts) получают следующий кадр
+            while position < len(frame_idxs) and frame_idxs[position] <= current:
+                if image is None:
+                    image = frame.to_ndarray(format="bgr24")
+                yield position, image
+                position += 1
+            if position == len(frame_idxs):
+                return
+
+    def _read_keyframes(self, frame_idxs):
+        # Первый кадр после seek - ключевой: каждый индекс стоит одного seek и одного кадра,
+        # без декодирования промежуточных кадров до точного индекса
+        for position, idx in enumerate(frame_idxs):
+            self._seek(idx)
+            for frame in self.container.decode(self.stream):
+                yield position, frame.to_ndarray(format="bgr24")
+                break
+
+    def close(self):
+        self.container.close()
+
+
+def decoder_threads():
+    """
+    Потоки декодирования кодека: по умолчанию ядра делятся между процессами воркера.
+    """
+    return settings.decoder_threads or max(1, (os.cpu_count() or 1) // settings.worker_processes)
+
+
+def open_decoder(video_path, backend=None):
+    backend = backend or settings.video_decoder
+    if backend == "opencv":
+        return OpenCVDecoder(video_path)
+    if backend == "pyav":
+        return PyAVDecoder(video_path)
+    raise ValueError(f"Unknown video decoder: {backend}")
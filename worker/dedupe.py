@@ -0,0 +1,53 @@
+import numpy as np
+from src.core.config import settings
+from .embedding_cache import hash_bits
+from .sampling import sample_frame_indices
+
+
+class FrameDeduplicator:
+    """
+    Подавление почти одинаковых кадров внутри одного видео.
+    Кадр сравнивается только с предыдущим принятым кадром того же прохода (соседом по времени):
+    если их dHash отличаются не более чем на max_distance бит, кадр не обрабатывается,
+    а добавляет вес этому представителю при голосовании.
+    """
+
+    def __init__(self, max_distance=None):
+        self.max_distance = settings.dedupe_max_distance if max_distance is None else max_distance
+        self.previous = None
+        self.weights = []
+        self.suppressed = 0
+
+    def is_duplicate(self, frame):
+        signature = hash_bits(frame)
+        if self.previous is not None and np.count_nonzero(self.previous != signature) <= self.max_distance:
+            self.weights[-1] += 1
+            self.suppressed += 1
+            return True
+        self.previous = signature
+        self.weights.append(1)
+        return False
+
+    def filter(self, frames):
+        """
+        Пропускает дальше только кадры-представители.
+        Каждый вызов - отдельный упорядоченный по времени проход (раунд выборки),
+        кадры разных раундов не соседи и не сравниваются.
+        """
+        self.previous = None
+        for frame in frames:
+            if not self.is_duplicate(frame):
+                yield frame
+
+
+def refill_indices(frame_count, max_frames, budget):
+    """
+    Дополнительные индексы между исходными точками linspace
+    для освободившегося после дедупликации бюджета.
+    """
+    sampled = set(sample_frame_indices(frame_count, max_frames).tolist())
+    candidates = sorted(set(sample_frame_indices(frame_count, 2 * max_frames).tolist()) - sampled)
+    if budget <= 0 or not candidates:
+        return np.empty(0, dtype=int)
+    picks = np.linspace(0, len(candidates) - 1, min(budget, len(candidates)), dtype=int)
+    return np.array(candidates)[np.unique(picks)]
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+from src.core.config import settings
+
+
+HASH_SIZE = 16
+DIGEST_SIZE = 32
+KEY_LENGTH = DIGEST_SIZE * 2
+# Схема ключей входит в пространство имён: записи со старыми ключами не переиспользуются
+KEY_SCHEME = "b2"
+
+
+def hash_bits(frame, hash_size=HASH_SIZE):
+    """
+    Разностный хеш (dHash) уменьшенного кадра, hash_size * hash_size бит.
+    """
+    small = cv2.resize(frame, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return (gray[:, 1:] > gray[:, :-1]).ravel()
+
+
+def frame_digest(frame):
+    """
+    Ключ кеша эмбеддингов: blake2b кадра uint8 размера входа модели (FramePreprocessor.resize).
+    Точный, а не перцептивный: локальная правка лица меняет ключ, даже если кадр в целом похож.
+    """
+    digest = hashlib.blake2b(np.ascontiguousarray(frame).data, digest_size=DIGEST_SIZE)
+    digest.update(repr(frame.shape).encode())
+    return digest.hexdigest()
+
+
+class MemoryTier:
+    """
+    LRU в памяти процесса.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key):
+        embedding = self.items.get(key)
+        if embedding is not None:
+            self.items.move_to_end(key)
+        return embedding
+
+    def put(self, key, embedding):
+        self.items[key] = embedding
+        self.items.move_to_end(key)
+        while len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+
+class DiskTier:
+    """
+    Memory-mapped файлы на диске: векторы (capacity, dim) float32 и ключи.
+    Число слотов ограничено размером, при заполнении вытесняется самый старый по обращению.
+    """
+
+    def __init__(self, path_prefix, capacity, dim):
+        os.makedirs(os.path.dirname(path_prefix) or ".", exist_ok=True)
+        vectors_path, keys_path = f"{path_prefix}.vectors", f"{path_prefix}.keys"
+        reuse = (
+            os.path.exists(vectors_path)
+            and os.path.exists(keys_path)
+            and os.path.getsize(vectors_path) == capacity * dim * 4
+            and os.path.getsize(keys_path) == capacity * KEY_LENGTH
+        )
+        mode = "r+" if reuse else "w+"
+        self.vectors = np.memmap(vectors_path, dtype=np.float32, mode=mode, shape=(capacity, dim))
+        self.keys = np.memmap(keys_path, dtype=f"S{KEY_LENGTH}", mode=mode, shape=(capacity,))
+        self.slots = OrderedDict((key.decode(), slot) for slot, key in enumerate(self.keys) if key)
+        self.free = [slot for slot, key in enumerate(self.keys) if not key]
+
+    def get(self, key):
+        slot = self.slots.get(key)
+        if slot is None:
+            return None
+        self.slots.move_to_end(key)
+        return np.array(self.vectors[slot])
+
+    def put(self, key, embedding):
+        if key in self.slots:
+            self.slots.move_to_end(key)
+            return
+        slot = self.free.pop() if self.free else self.slots.popitem(last=False)[1]
+        # Ключ пишется после вектора, чтобы слот не указывал на недописанные данные
+        self.keys[slot] = b""
+        self.vectors[slot] = embedding
+        self.keys[slot] = key.encode()
+        self.slots[key] = slot
+
+
+class EmbeddingCache:
+    """
+    Двухуровневый кеш эмбеддингов EfficientNet, общий для всех видео воркера.
+    Ключ - точный хеш входа backbone, пространство имён - версия модели и параметры предобработки.
+    """
+
+    def __init__(self, namespace, dim, memory_items, disk_dir=None, disk_bytes=0):
+        self.memory = MemoryTier(memory_items)
+        capacity = disk_bytes // (dim * 4 + KEY_LENGTH) if disk_dir else 0
+        self.disk = DiskTier(os.path.join(disk_dir, namespace), capacity, dim) if capacity > 0 else None
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            embedding = self.memory.get(key)
+            if embedding is None and self.disk is not None:
+                embedding = self.disk.get(key)
+                if embedding is not None:
+                    self.memory.put(key, embedding)
+            return embedding
+
+    def put(self, key, embedding):
+        embedding = np.array(embedding, dtype=np.float32)
+        with self._lock:
+            self.memory.put(key, embedding)
+            if self.disk is not None:
+                self.disk.put(key, embedding)
+
+
+def create_embedding_cache(input_size, precision, model_version=None, dim=1792, shard=0, shards=1):
+    """
+    shards > 1 - несколько процессов воркера: у каждого свой файл на диске
+    (индекс слотов хранится в памяти процесса), общий объём делится между ними.
+    """
+    if not settings.embedding_cache_enabled:
+        return None
+    namespace = f"{model_version or settings.model_version}-{precision}-{input_size}-{settings.preprocess_channel_order}-{KEY_SCHEME}"
+    if shards > 1:
+        namespace = f"{namespace}.{shard}"
+    return EmbeddingCache(
+        namespace,
+        dim,
+        memory_items=settings.embedding_cache_memory_items,
+        disk_dir=settings.embedding_cache_dir,
+        disk_bytes=settings.embedding_cache_disk_bytes // shards,
+    )
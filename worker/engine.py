@@ -0,0 +1,255 @@
+import json
+import os
+import socket
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+import torch
+import torchvision.models as models
+from src.core.config import settings
+from .quantization import apply_precision
+from .registry import BACKBONE_WEIGHTS, HEAD_WEIGHTS, registry
+from .ipc import recv_message, send_message
+
+
+ENGINES = ("eager", "torchscript", "remote")
+BACKBONE_FILE = "backbone.pt"
+HEAD_FILE = "head.pt"
+METADATA_FILE = "metadata.json"
+
+
+class MLPClassifierV2(torch.nn.Module):
+    def __init__(self, input_dim=1796):
+        super(MLPClassifierV2, self).__init__()
+        self.dropout1 = torch.nn.Dropout(0.5)
+        self.dropout2 = torch.nn.Dropout(0.3)
+        self.dropout3 = torch.nn.Dropout(0.1)
+        self.model = torch.nn.Sequential(
+            torch.nn.Linear(input_dim, 1024),
+            torch.nn.BatchNorm1d(1024),
+            torch.nn.ReLU(),
+            self.dropout1,
+            torch.nn.Linear(1024, 512),
+            torch.nn.BatchNorm1d(512),
+            torch.nn.ReLU(),
+            self.dropout2,
+            torch.nn.Linear(512, 128),
+            torch.nn.BatchNorm1d(128),
+            torch.nn.ReLU(),
+            self.dropout3,
+            torch.nn.Linear(128, 1)
+        )
+
+    def forward(self, x):
+        return self.model(x)
+
+
+class ScoringHead(torch.nn.Module):
+    """
+    MLP + sigmoid: признаки (N, 1796) -> вероятности FAKE (N,).
+    """
+
+    def __init__(self, mlp_model):
+        super(ScoringHead, self).__init__()
+        self.mlp = mlp_model
+
+    def forward(self, x):
+        return torch.sigmoid(self.mlp(x)).squeeze(1)
+
+
+class InferenceEngine(ABC):
+    """
+    Вычисления модели для predict: эмбеддинги backbone и оценка MLP.
+    """
+
+    model_version = settings.model_version
+    precision = "fp32"
+    input_size = 380
+    embedding_dim = 1792
+
+    @abstractmethod
+    def embed(self, input_tensor):
+        """
+        Батч (B, 3, H, W) -> эмбеддинги EfficientNet (B, 1792), numpy.
+        """
+        pass
+
+    @abstractmethod
+    def score(self, features):
+        """
+        Признаки (N, 1796) -> вероятности FAKE (N,), numpy.
+        """
+        pass
+
+
+class EagerEngine(InferenceEngine):
+    """
+    Обычные PyTorch модули, собираемые в Python при старте воркера.
+    """
+
+    def __init__(self, effnet, mlp_model, device, precision="fp32", model_version=None, input_size=380, embedding_dim=1792):
+        self.effnet = effnet
+        self.head = ScoringHead(mlp_model).eval()
+        self.device = device
+        self.precision = precision
+        self.model_version = model_version or settings.model_version
+        self.input_size = input_size
+        self.embedding_dim = embedding_dim
+
+    def embed(self, input_tensor):
+        with torch.no_grad():
+            return self.effnet(input_tensor.to(self.device)).cpu().numpy()
+
+    def score(self, features):
+        features = torch.as_tensor(features, dtype=torch.float32).to(self.device)
+        with torch.no_grad():
+            return self.head(features).cpu().numpy()
+
+
+class TorchScriptEngine(InferenceEngine):
+    """
+    Замороженные TorchScript графы backbone и MLP из каталога артефакта.
+    """
+
+    def __init__(self, artifact_dir, device, model_version=None, input_size=None):
+        with open(os.path.join(artifact_dir, METADATA_FILE)) as f:
+            self.metadata = json.load(f)
+        model_version = model_version or settings.model_version
+        if self.metadata["model_version"] != model_version:
+            raise ValueError(
+                f"Exported engine is model version {self.metadata['model_version']}, expected {model_version}"
+            )
+        if input_size and self.metadata["input_size"] != input_size:
+            raise ValueError(f"Exported engine takes {self.metadata['input_size']}px input, expected {input_size}px")
+        # Слияние oneDNN несовместимо с динамически квантованными int8 графами
+        if settings.torchscript_onednn_fusion and device.type == "cpu" and self.metadata["precision"] == "fp32":
+            torch.jit.enable_onednn_fusion(True)
+        self.backbone = torch.jit.load(os.path.join(artifact_dir, BACKBONE_FILE), map_location=device)
+        self.head = torch.jit.load(os.path.join(artifact_dir, HEAD_FILE), map_location=device)
+        self.device = device
+        self.model_version = self.metadata["model_version"]
+        self.precision = self.metadata["precision"]
+        self.input_size = self.metadata["input_size"]
+        self.embedding_dim = self.metadata.get("embedding_dim", 1792)
+
+    def embed(self, input_tensor):
+        with torch.no_grad():
+            return self.backbone(input_tensor.to(self.device)).cpu().numpy()
+
+    def score(self, features):
+        features = torch.as_tensor(features, dtype=torch.float32).to(self.device)
+        with torch.no_grad():
+            return self.head(features).cpu().numpy()
+
+
+class RemoteEngine(InferenceEngine):
+    """
+    Клиент локального сервера инференса (worker.inference_server):
+    кадры разных задач объединяются в общие батчи на стороне сервера.
+    """
+
+    def __init__(self, socket_path, model_version=None, input_size=380):
+        self.socket_path = socket_path
+        self.model = {"model_version": model_version or settings.model_version, "input_size": input_size}
+        self._sock = None
+        self._pid = None
+        self._lock = threading.Lock()
+        info, _ = self._request({"op": "describe", **self.model})
+        self.model_version = info["model_version"]
+        self.precision = info["precision"]
+        self.input_size = info["input_size"]
+        self.embedding_dim = info["embedding_dim"]
+
+    def _connect(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(self.socket_path)
+        self._pid = os.getpid()
+
+    def _request(self, header, array=None):
+        with self._lock:
+            # После форка соединение родительского процесса не используется
+            if self._sock is None or self._pid != os.getpid():
+                self._connect()
+            try:
+                send_message(self._sock, header, array)
+                response, result = recv_message(self._sock)
+            except OSError:
+                self._sock.close()
+                self._sock = None
+                raise
+        if "error" in response:
+            raise RuntimeError(f"Inference server error: {response['error']}")
+        return response, result
+
+    def embed(self, input_tensor):
+        # channels_last тензор передаётся как его NHWC буфер, без перестановки данных
+        _, embeddings = self._request({"op": "embed", **self.model}, input_tensor.permute(0, 2, 3, 1).numpy())
+        return embeddings
+
+    def score(self, features):
+        _, probs = self._request({"op": "score", **self.model}, np.asarray(features, dtype=np.float32))
+        return probs
+
+
+def configure_torch_threads(processes=1):
+    """
+    Настройка intra-op / inter-op потоков PyTorch (0 - оставить по умолчанию).
+    Если процессов несколько, ядра по умолчанию делятся между ними поровну.
+    """
+    intra_op_threads = settings.torch_intra_op_threads
+    if not intra_op_threads and processes > 1:
+        intra_op_threads = max(1, (os.cpu_count() or 1) // processes)
+    if intra_op_threads > 0:
+        torch.set_num_threads(intra_op_threads)
+    if settings.torch_inter_op_threads > 0:
+        try:
+            torch.set_interop_threads(settings.torch_inter_op_threads)
+        except RuntimeError:
+            # Можно задать только до первой параллельной операции
+            pass
+
+
+def build_eager_engine(device, precision=None, version=None, input_size=380):
+    """
+    Модели из локального реестра, без обращения к сети.
+    Модули создаются на meta устройстве и получают mmap тензоры из реестра без копирования.
+    """
+    precision = precision or settings.inference_precision
+    version = version or settings.model_version
+    if settings.model_registry_verify:
+        registry.verify(version)
+    backbone = registry.manifest(version).get("backbone", "efficientnet_b4")
+
+    with torch.device("meta"):
+        effnet = models.get_model(backbone, weights=None)
+        embedding_dim = effnet.classifier[-1].in_features
+        effnet.classifier = torch.nn.Identity()
+        mlp_model = MLPClassifierV2(input_dim=embedding_dim + 4)
+    effnet.load_state_dict(registry.load(version, BACKBONE_WEIGHTS), assign=True)
+    mlp_model.load_state_dict(registry.load(version, HEAD_WEIGHTS), assign=True)
+    effnet = effnet.to(device).eval()
+    mlp_model = mlp_model.to(device).eval()
+
+    effnet, mlp_model = apply_precision(effnet, mlp_model, precision, device)
+    return EagerEngine(effnet, mlp_model, device, precision, version, input_size, embedding_dim)
+
+
+def create_engine(engine=None, precision=None, version=None, input_size=380):
+    """
+    Движок инференса по настройкам: eager, torchscript (экспортированный артефакт)
+    или remote (локальный сервер инференса с общими батчами).
+    """
+    version = version or settings.model_version
+    engine = engine or settings.inference_engine
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown inference engine: {engine}")
+
+    configure_torch_threads()
+    if engine == "remote":
+        return RemoteEngine(settings.inference_server_socket, version, input_size)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    if engine == "torchscript":
+        return TorchScriptEngine(os.path.join(settings.engine_artifact_dir, version), device, version, input_size)
+    return build_eager_engine(device, precision, version, input_size)
@@ -0,0 +1,115 @@
+"""
+Экспорт backbone + MLP в замороженные TorchScript графы и проверка артефакта против eager моделей.
+
+    python -m worker.export
+    python -m worker.export --tier fast --precision int8 --verify-video sample.mp4
+    python -m worker.export --verify-only
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import torch
+
+from src.core.config import settings
+from src.inference.tiers import AnalysisTier, tier_profile
+from .engine import BACKBONE_FILE, HEAD_FILE, METADATA_FILE, ScoringHead, TorchScriptEngine, build_eager_engine
+from .preprocessing import FramePreprocessor
+from .sampling import extract_frames
+
+
+def trace_frozen(module, example):
+    """
+    Трассировка eval модуля и заморозка: веса становятся константами графа.
+    """
+    with torch.no_grad():
+        traced = torch.jit.trace(module, example)
+    return torch.jit.freeze(traced.eval())
+
+
+def export_engine(output_dir, precision, batch_size, profile):
+    device = torch.device("cpu")
+    eager = build_eager_engine(device, precision, profile.model_version, profile.input_size)
+    size = eager.input_size
+    example = torch.rand(batch_size, 3, size, size).contiguous(memory_format=torch.channels_last)
+
+    os.makedirs(output_dir, exist_ok=True)
+    torch.jit.save(trace_frozen(eager.effnet, example), os.path.join(output_dir, BACKBONE_FILE))
+    torch.jit.save(trace_frozen(ScoringHead(eager.head.mlp).eval(), torch.rand(batch_size, eager.embedding_dim + 4)), os.path.join(output_dir, HEAD_FILE))
+
+    metadata = {
+        "model_version": profile.model_version,
+        "precision": precision,
+        "input_size": size,
+        "embedding_dim": eager.embedding_dim,
+        "channel_order": settings.preprocess_channel_order,
+        "torch_version": torch.__version__,
+    }
+    with open(os.path.join(output_dir, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+    return eager
+
+
+def verify_engine(eager, output_dir, batch_sizes, video_path=None, max_frames=16):
+    """
+    Сравнение эмбеддингов и вероятностей экспортированного графа с eager моделями.
+    Возвращает максимальные расхождения (embedding, probability).
+    """
+    exported = TorchScriptEngine(output_dir, torch.device("cpu"), eager.model_version, eager.input_size)
+    preprocessor = FramePreprocessor(size=exported.input_size)
+
+    inputs = []
+    if video_path:
+        frames = extract_frames(video_path, max_frames, min_side=preprocessor.size)
+        if not frames:
+            raise ValueError("No frames extracted from video.")
+        inputs.append(preprocessor(frames))
+    for batch_size in batch_sizes:
+        frames = [np.random.randint(0, 256, (preprocessor.size, preprocessor.size, 3), dtype=np.uint8) for _ in range(batch_size)]
+        inputs.append(preprocessor(frames))
+
+    embed_error = score_error = 0.0
+    for input_tensor in inputs:
+        expected, actual = eager.embed(input_tensor), exported.embed(input_tensor)
+        embed_error = max(embed_error, float(np.abs(expected - actual).max()))
+
+        features = np.concatenate([expected, np.random.rand(len(expected), 4)], axis=1)
+        score_error = max(score_error, float(np.abs(eager.score(features) - exported.score(features)).max()))
+        print(f"batch {len(input_tensor)}: max |d embedding| {embed_error:.2e}, max |d probability| {score_error:.2e}")
+    return embed_error, score_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tier", choices=[tier.value for tier in AnalysisTier], help="Export the model of this analysis tier")
+    parser.add_argument("--output", help="Artifact directory (default: ENGINE_ARTIFACT_DIR/<model version>)")
+    parser.add_argument("--precision", default=settings.inference_precision)
+    parser.add_argument("--batch-size", type=int, default=settings.inference_batch_size, help="Example batch size for tracing")
+    parser.add_argument("--verify-video", help="Also compare on frames of this video")
+    parser.add_argument("--verify-batch-sizes", default="1,3,8", help="Comma separated batch sizes of random frames to compare on")
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="Maximum allowed probability difference")
+    parser.add_argument("--verify-only", action="store_true", help="Verify an existing artifact without exporting")
+    args = parser.parse_args()
+    profile = tier_profile(args.tier)
+    output = args.output or os.path.join(settings.engine_artifact_dir, profile.model_version)
+
+    if args.verify_only:
+        with open(os.path.join(output, METADATA_FILE)) as f:
+            precision = json.load(f)["precision"]
+        eager = build_eager_engine(torch.device("cpu"), precision, profile.model_version, profile.input_size)
+    else:
+        eager = export_engine(output, args.precision, args.batch_size, profile)
+        print(f"exported {args.precision} {profile.model_version} engine to {output}")
+
+    batch_sizes = [int(size) for size in args.verify_batch_sizes.split(",") if size]
+    _, score_error = verify_engine(eager, output, batch_sizes, args.verify_video)
+    if score_error > args.tolerance:
+        print(f"FAILED: probability difference {score_error:.2e} exceeds tolerance {args.tolerance:.0e}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
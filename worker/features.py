@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+
+
+def to_grayscale_stack(frames):
+    """
+    Перевод кадров одного размера в оттенки серого, стек формы (N, H, W).
+    """
+    height, width = frames[0].shape[:2]
+    grays = np.empty((len(frames), height, width), dtype=np.uint8)
+    for i, frame in enumerate(frames):
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=grays[i])
+    return grays
+
+
+def eyeblink_rate(num_frames):
+    return np.random.uniform(0.1, 0.5, size=num_frames)
+
+
+def head_pose_variance(num_frames):
+    return np.random.uniform(0.05, 0.2, size=num_frames)
+
+
+def texture_variance(grays):
+    """
+    Средний по столбцам коэффициент вариации (как scipy.stats.variation), форма (N,).
+    """
+    grays = grays.astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        column_variation = grays.std(axis=1) / grays.mean(axis=1)
+    return column_variation.mean(axis=1, dtype=np.float64)
+
+
+def blur_score(grays):
+    """
+    Дисперсия лапласиана каждого кадра, форма (N,).
+    Лапласиан считается по кадрам, чтобы границы не смешивались.
+    """
+    return np.array([cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_64F))[1][0, 0] ** 2 for gray in grays])
+
+
+def handcrafted_features(frames):
+    """
+    Ручные признаки кадров, форма (N, 4):
+    eyeblink rate, head pose variance, texture variance, blur score.
+    """
+    if len({frame.shape for frame in frames}) > 1:
+        return np.concatenate([handcrafted_features([frame]) for frame in frames])
+
+    grays = to_grayscale_stack(frames)
+    return np.column_stack([
+        eyeblink_rate(len(frames)),
+        head_pose_variance(len(frames)),
+        texture_variance(grays),
+        blur_score(grays),
+    ])
@@ -0,0 +1,172 @@
+"""
+Локальный сервер инференса: собирает кадры из многих задач predict в общие батчи EfficientNet.
+Задачи Celery при этом только декодируют кадры и агрегируют результат (INFERENCE_ENGINE=remote).
+
+    python -m worker.inference_server
+    python -m worker.inference_server --tier fast --tier standard --max-batch-size 32 --max-wait-ms 10
+"""
+import argparse
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+import torch
+
+from src.core.config import settings
+from src.inference.tiers import AnalysisTier, tier_profile
+from .engine import create_engine
+from .ipc import recv_message, send_message
+
+
+EmbedRequest = namedtuple('EmbedRequest', ['tensor', 'future'])
+
+
+class MicroBatcher:
+    """
+    Динамические микро-батчи для одного движка: запросы копятся, пока батч не наберёт
+    max_batch_size кадров или с первого запроса батча не пройдёт max_wait секунд.
+    """
+
+    def __init__(self, engine, max_batch_size=None, max_wait=None):
+        self.engine = engine
+        self.max_batch_size = max_batch_size or settings.inference_server_max_batch_size
+        self.max_wait = settings.inference_server_max_wait_ms / 1000 if max_wait is None else max_wait
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.frames = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, tensor):
+        future = Future()
+        self.requests.put(EmbedRequest(tensor, future))
+        return future
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        size = len(batch[0].tensor)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.tensor)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                embeddings = self.engine.embed(torch.cat([request.tensor for request in batch]))
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.frames += len(embeddings)
+            offset = 0
+            for request in batch:
+                request.future.set_result(embeddings[offset:offset + len(request.tensor)])
+                offset += len(request.tensor)
+
+
+class InferenceService:
+    """
+    Движки и батчеры по (версия модели, размер входа), создаются при первом запросе.
+    """
+
+    def __init__(self, engine=None, max_batch_size=None, max_wait=None):
+        self.engine = engine or settings.inference_server_engine
+        if self.engine == "remote":
+            raise ValueError("Inference server cannot use the remote engine")
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batchers = {}
+        self._lock = threading.Lock()
+
+    def batcher(self, model_version, input_size):
+        with self._lock:
+            key = (model_version, input_size)
+            if key not in self.batchers:
+                engine = create_engine(self.engine, version=model_version, input_size=input_size)
+                self.batchers[key] = MicroBatcher(engine, self.max_batch_size, self.max_wait)
+            return self.batchers[key]
+
+    def handle(self, header, array):
+        batcher = self.batcher(header["model_version"], header["input_size"])
+        engine = batcher.engine
+        if header["op"] == "describe":
+            return {
+                "model_version": engine.model_version,
+                "precision": engine.precision,
+                "input_size": engine.input_size,
+                "embedding_dim": engine.embedding_dim,
+                "batches": batcher.batches,
+                "frames": batcher.frames,
+            }, None
+        if header["op"] == "embed":
+            # NHWC буфер клиента как NCHW тензор в формате channels_last
+            tensor = torch.from_numpy(array).permute(0, 3, 1, 2)
+            return {}, batcher.submit(tensor).result()
+        if header["op"] == "score":
+            return {}, engine.score(array)
+        raise ValueError(f"Unknown operation: {header['op']}")
+
+
+class ConnectionHandler(socketserver.BaseRequestHandler):
+    """
+    Одно соединение на процесс воркера; запросы в нём идут последовательно.
+    """
+
+    def handle(self):
+        while True:
+            try:
+                header, array = recv_message(self.request)
+            except ConnectionError:
+                return
+            try:
+                response, result = self.server.service.handle(header, array)
+            except Exception as e:
+                response, result = {"error": str(e)}, None
+            send_message(self.request, response, result)
+
+
+class InferenceServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, service):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.service = service
+        super().__init__(socket_path, ConnectionHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=settings.inference_server_socket)
+    parser.add_argument("--tier", action="append", choices=[tier.value for tier in AnalysisTier], help="Preload the model of this tier (repeatable)")
+    parser.add_argument("--max-batch-size", type=int, default=settings.inference_server_max_batch_size)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.inference_server_max_wait_ms)
+    args = parser.parse_args()
+
+    service = InferenceService(max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000)
+    for tier in args.tier or settings.preload_analysis_tiers:
+        profile = tier_profile(tier)
+        service.batcher(profile.model_version, profile.input_size)
+
+    with InferenceServer(args.socket, service) as server:
+        print(f"inference server listening on {args.socket}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import json
+import struct
+import numpy as np
+
+
+HEADER_SIZE = struct.Struct("!I")
+
+
+def send_message(sock, header, array=None):
+    """
+    Сообщение: длина JSON заголовка, заголовок, затем сырые байты массива (если есть).
+    Форма и dtype массива передаются в заголовке.
+    """
+    if array is not None:
+        array = np.ascontiguousarray(array)
+        header = dict(header, shape=list(array.shape), dtype=array.dtype.str)
+    encoded = json.dumps(header).encode()
+    sock.sendall(HEADER_SIZE.pack(len(encoded)) + encoded)
+    if array is not None:
+        sock.sendall(memoryview(array).cast("B"))
+
+
+def recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Connection closed")
+        received += count
+    return buffer
+
+
+def recv_message(sock):
+    """
+    Возвращает (заголовок, массив или None).
+    """
+    (length,) = HEADER_SIZE.unpack(recv_exactly(sock, HEADER_SIZE.size))
+    header = json.loads(recv_exactly(sock, length))
+    if "shape" not in header:
+        return header, None
+    dtype = np.dtype(header["dtype"])
+    size = int(np.prod(header["shape"])) * dtype.itemsize
+    array = np.frombuffer(recv_exactly(sock, size), dtype=dtype).reshape(header["shape"])
+    return header, array
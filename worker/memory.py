@@ -0,0 +1,102 @@
+import math
+import resource
+import threading
+import cv2
+import numpy as np
+from src.core.config import settings
+
+
+def working_size(width, height, capacity, max_side=None, budget=None, min_side=0):
+    """
+    Рабочее разрешение (w, h) для capacity кадров: пропорции сохраняются, кадр только
+    уменьшается - до max_side по длинной стороне и так, чтобы все кадры уместились в budget байт.
+    """
+    max_side = max_side or settings.decode_max_side
+    budget = budget or settings.frame_memory_budget
+    scale = min(1.0, max_side / max(width, height), math.sqrt(budget / (capacity * width * height * 3)))
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    if min(size) < min(min_side, width, height):
+        raise ValueError(
+            f"Frame memory budget of {budget} bytes is too small for {capacity} frames "
+            f"with a shorter side of at least {min_side}px"
+        )
+    return size
+
+
+class FrameBuffer:
+    """
+    Предвыделенный буфер uint8 на capacity кадров рабочего разрешения.
+    Массив выделяется по первому кадру; каждый декодированный кадр сразу уменьшается
+    в свободный слот, а слот возвращается через release после предобработки.
+    """
+
+    def __init__(self, capacity, min_side=0):
+        self.capacity = capacity
+        self.min_side = min_side
+        self.frames = None
+        self._free = list(range(capacity - 1, -1, -1))
+        self._available = threading.Condition()
+
+    @property
+    def nbytes(self):
+        return 0 if self.frames is None else self.frames.nbytes
+
+    @property
+    def size(self):
+        return None if self.frames is None else (self.frames.shape[2], self.frames.shape[1])
+
+    def put(self, frame):
+        """
+        Копия кадра в свободном слоте (с уменьшением); ждёт, пока слот не освободится.
+        """
+        if self.frames is None:
+            width, height = working_size(frame.shape[1], frame.shape[0], self.capacity, min_side=self.min_side)
+            self.frames = np.empty((self.capacity, height, width, 3), dtype=np.uint8)
+        with self._available:
+            self._available.wait_for(lambda: self._free)
+            slot = self.frames[self._free.pop()]
+        if frame.shape == slot.shape:
+            np.copyto(slot, frame)
+        else:
+            cv2.resize(frame, self.size, dst=slot, interpolation=cv2.INTER_AREA)
+        return slot
+
+    def fill(self, frames):
+        for frame in frames:
+            yield self.put(frame)
+
+    def release(self, frames):
+        """
+        Возврат слотов кадров, полученных из put.
+        """
+        with self._available:
+            for frame in frames:
+                self._free.append((frame.ctypes.data - self.frames.ctypes.data) // self.frames[0].nbytes)
+            self._available.notify_all()
+
+
+def reset_peak_rss():
+    """
+    Сброс пика RSS процесса (VmHWM, Linux 4.0+), чтобы пик считался по задаче.
+    Возвращает False, если сброс не поддерживается и пик считается с запуска процесса.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    """
+    Пик RSS процесса в байтах.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
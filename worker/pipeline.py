@@ -0,0 +1,109 @@
+import queue
+import threading
+from src.core.config import settings
+
+
+_DONE = object()
+
+
+class FramePipeline:
+    """
+    Потоковый конвейер decode -> preprocess -> inference.
+    Каждая стадия работает в своём потоке, между стадиями - ограниченные очереди,
+    поэтому декодирование OpenCV и вычисления PyTorch идут одновременно.
+    """
+
+    def __init__(self, batch_size=None, queue_size=None):
+        self.batch_size = batch_size or settings.inference_batch_size
+        self.queue_size = queue_size or settings.pipeline_queue_size
+
+    @property
+    def frames_in_flight(self):
+        """
+        Максимум одновременно живых кадров: очередь декодирования, собираемый батч и кадр декодера.
+        """
+        return self.queue_size + self.batch_size + 1
+
+    def run(self, frames, preprocess, infer):
+        """
+        frames - итератор кадров (декодирование идёт при итерации),
+        preprocess(batch) - подготовка микро-батча кадров,
+        infer(prepared) - вычисления модели над подготовленным батчем.
+        Возвращает результаты infer в порядке кадров.
+        """
+        decoded = queue.Queue(maxsize=self.queue_size)
+        prepared = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors = []
+        results = []
+
+        def decode_stage():
+            for frame in frames:
+                if not self._put(decoded, frame, stop):
+                    return
+            self._put(decoded, _DONE, stop)
+
+        def preprocess_stage():
+            batch = []
+            while True:
+                frame = self._get(decoded, stop)
+                if frame is None:
+                    return
+                if frame is not _DONE:
+                    batch.append(frame)
+                if batch and (frame is _DONE or len(batch) == self.batch_size):
+                    if not self._put(prepared, preprocess(batch), stop):
+                        return
+                    batch = []
+                if frame is _DONE:
+                    self._put(prepared, _DONE, stop)
+                    return
+
+        def infer_stage():
+            while True:
+                item = self._get(prepared, stop)
+                if item is None or item is _DONE:
+                    return
+                results.append(infer(item))
+
+        threads = [
+            threading.Thread(target=self._guard(stage, stop, errors), name=f"pipeline-{name}", daemon=True)
+            for name, stage in (("decode", decode_stage), ("preprocess", preprocess_stage), ("infer", infer_stage))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return results
+
+    @staticmethod
+    def _guard(stage, stop, errors):
+        def wrapper():
+            try:
+                stage()
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+        return wrapper
+
+    @staticmethod
+    def _put(q, item, stop):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(q, stop):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+import torch
+from src.core.config import settings
+
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+class FramePreprocessor:
+    """
+    Пакетная подготовка кадров для EfficientNet без PIL:
+    resize, порядок каналов (BGR как у исходной цепочки ToPILImage или RGB),
+    масштабирование и нормализация в один float32 буфер.
+    """
+
+    def __init__(self, size=380, channel_order=None):
+        self.size = size
+        self.channel_order = channel_order or settings.preprocess_channel_order
+        if self.channel_order not in ("rgb", "bgr"):
+            raise ValueError(f"Unknown channel order: {self.channel_order}")
+        # (x / 255 - mean) / std == x * scale - offset
+        self._scale = 1.0 / (255.0 * IMAGENET_STD)
+        self._offset = IMAGENET_MEAN / IMAGENET_STD
+
+    def __call__(self, frames):
+        """
+        Список BGR кадров (H, W, 3) uint8 -> тензор (N, 3, size, size).
+        """
+        return self.to_tensor([self.resize(frame) for frame in frames])
+
+    def to_tensor(self, resized):
+        """
+        Кадры, уже приведённые к size x size через resize -> тензор (N, 3, size, size).
+        """
+        batch = np.empty((len(resized), self.size, self.size, 3), dtype=np.float32)
+        for i, frame in enumerate(resized):
+            batch[i] = frame[..., ::-1] if self.channel_order == "rgb" else frame
+        batch *= self._scale
+        batch -= self._offset
+        # NHWC буфер как NCHW тензор в формате channels_last, без копирования
+        return torch.from_numpy(batch).permute(0, 3, 1, 2)
+
+    def resize(self, frame):
+        """
+        Кадр uint8 размера входа модели: вход backbone однозначно определяется этим кадром.
+        """
+        height, width = frame.shape[:2]
+        if (height, width) == (self.size, self.size):
+            return frame
+        shrinking = height > self.size or width > self.size
+        interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR
+        return cv2.resize(frame, (self.size, self.size), interpolation=interpolation)
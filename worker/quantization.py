@@ -0,0 +1,63 @@
+import torch
+import torch.ao.nn.quantized.dynamic as nnqd
+from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+from torch.nn.utils.fusion import fuse_conv_bn_eval, fuse_linear_bn_eval
+from torchvision.ops.misc import Conv2dNormActivation
+
+
+PRECISIONS = ("fp32", "int8")
+
+
+def fold_backbone_batchnorm(effnet):
+    """
+    Сворачивание BatchNorm2d в предыдущую свёртку (только для eval).
+    """
+    for module in effnet.modules():
+        if isinstance(module, Conv2dNormActivation) and isinstance(module[1], torch.nn.BatchNorm2d):
+            module[0] = fuse_conv_bn_eval(module[0], module[1])
+            module[1] = torch.nn.Identity()
+    return effnet
+
+
+def fold_head_batchnorm(mlp_model):
+    """
+    Сворачивание BatchNorm1d в предыдущий Linear слой MLPClassifierV2.
+    """
+    layers = mlp_model.model
+    for i in range(len(layers) - 1):
+        if isinstance(layers[i], torch.nn.Linear) and isinstance(layers[i + 1], torch.nn.BatchNorm1d):
+            layers[i] = fuse_linear_bn_eval(layers[i], layers[i + 1])
+            layers[i + 1] = torch.nn.Identity()
+    return mlp_model
+
+
+def quantize_int8(model):
+    """
+    Динамическая INT8 квантизация Linear и точечных (1x1) свёрток.
+    Depthwise свёртки остаются в fp32: для них int8 ядра на CPU медленнее.
+    """
+    names = {
+        name for name, module in model.named_modules()
+        if isinstance(module, torch.nn.Linear)
+        or (isinstance(module, torch.nn.Conv2d) and module.groups == 1 and module.kernel_size == (1, 1))
+    }
+    return quantize_dynamic(
+        model,
+        {name: default_dynamic_qconfig for name in names},
+        mapping={torch.nn.Linear: nnqd.Linear, torch.nn.Conv2d: nnqd.Conv2d},
+    )
+
+
+def apply_precision(effnet, mlp_model, precision, device):
+    """
+    Перевод загруженных моделей в режим точности fp32 или int8 (один раз при загрузке).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown inference precision: {precision}")
+    if precision == "fp32":
+        return effnet, mlp_model
+    if device.type != "cpu":
+        raise ValueError("int8 inference precision is only supported on CPU")
+    effnet = quantize_int8(fold_backbone_batchnorm(effnet))
+    mlp_model = quantize_int8(fold_head_batchnorm(mlp_model))
+    return effnet, mlp_model
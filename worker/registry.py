@@ -0,0 +1,143 @@
+"""
+Локальный реестр артефактов модели: веса backbone и MLP по версиям, с контрольными суммами.
+
+    <model_registry_dir>/<version>/backbone.pt
+    <model_registry_dir>/<version>/head.pt
+    <model_registry_dir>/<version>/manifest.json
+
+Публикация - единственный шаг, которому нужна сеть (веса EfficientNet из torchvision):
+
+    python -m worker.registry publish --head models/best_model.pth
+    python -m worker.registry publish --tier fast --backbone efficientnet_b0 --head models/fast_model.pth
+    python -m worker.registry verify --tier fast
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import torch
+
+from src.core.config import settings
+from src.inference.tiers import AnalysisTier, tier_profile
+
+
+BACKBONES = ("efficientnet_b0", "efficientnet_b2", "efficientnet_b4")
+BACKBONE_WEIGHTS = "backbone.pt"
+HEAD_WEIGHTS = "head.pt"
+MANIFEST_FILE = "manifest.json"
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Версионированные веса моделей на локальном диске.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def artifact_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def publish(self, version, artifacts, backbone="efficientnet_b4"):
+        """
+        Сохранение state_dict артефактов {имя файла: state_dict} и манифеста с sha256.
+        backbone - архитектура torchvision, на эмбеддингах которой обучен MLP.
+        Манифест пишется последним, поэтому версия без него считается неопубликованной.
+        """
+        path = self.artifact_dir(version)
+        os.makedirs(path, exist_ok=True)
+        checksums = {}
+        for name, state_dict in artifacts.items():
+            torch.save(state_dict, os.path.join(path, name))
+            checksums[name] = sha256_file(os.path.join(path, name))
+
+        manifest = {
+            "version": version,
+            "backbone": backbone,
+            "files": checksums,
+            "torch_version": torch.__version__,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(os.path.join(path, MANIFEST_FILE + ".tmp"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(os.path.join(path, MANIFEST_FILE + ".tmp"), os.path.join(path, MANIFEST_FILE))
+        return manifest
+
+    def published(self, version):
+        return os.path.exists(os.path.join(self.artifact_dir(version), MANIFEST_FILE))
+
+    def manifest(self, version):
+        path = os.path.join(self.artifact_dir(version), MANIFEST_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Model version {version} is not published in {self.root}, run `python -m worker.registry publish`"
+            )
+        with open(path) as f:
+            return json.load(f)
+
+    def verify(self, version):
+        """
+        Проверка контрольных сумм всех файлов версии.
+        """
+        for name, checksum in self.manifest(version)["files"].items():
+            if sha256_file(os.path.join(self.artifact_dir(version), name)) != checksum:
+                raise ValueError(f"Checksum mismatch for {name} of model version {version}")
+
+    def load(self, version, name):
+        """
+        state_dict из реестра через mmap: страницы весов берутся из page cache
+        и разделяются между процессами, а не копируются в память каждого.
+        """
+        if name not in self.manifest(version)["files"]:
+            raise FileNotFoundError(f"{name} is not part of model version {version}")
+        return torch.load(os.path.join(self.artifact_dir(version), name), map_location="cpu", mmap=True, weights_only=True)
+
+
+registry = ModelRegistry(settings.model_registry_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    publish = subparsers.add_parser("publish", help="Publish backbone and head weights as a model version")
+    publish.add_argument("--head", default="models/best_model.pth", help="MLPClassifierV2 state_dict")
+    publish.add_argument("--backbone", choices=BACKBONES, default="efficientnet_b4")
+    verify = subparsers.add_parser("verify", help="Verify checksums of a model version")
+    for subparser in (publish, verify):
+        subparser.add_argument("--tier", choices=[tier.value for tier in AnalysisTier], help="Use the model version of this tier")
+        subparser.add_argument("--version", help="Model version (default: the version of --tier or MODEL_VERSION)")
+    args = parser.parse_args()
+    version = args.version or tier_profile(args.tier).model_version
+
+    if args.command == "publish":
+        import torchvision.models as models
+        effnet = models.get_model(args.backbone, weights="DEFAULT")
+        effnet.classifier = torch.nn.Identity()
+        head = torch.load(args.head, map_location="cpu", weights_only=True)
+        manifest = registry.publish(version, {BACKBONE_WEIGHTS: effnet.state_dict(), HEAD_WEIGHTS: head}, args.backbone)
+        print(f"published model version {version} to {registry.artifact_dir(version)}")
+        for name, checksum in manifest["files"].items():
+            print(f"  {name} sha256:{checksum}")
+        return
+
+    try:
+        registry.verify(version)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    print(f"model version {version} OK")
+
+
+if __name__ == "__main__":
+    main()
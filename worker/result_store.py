@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from src.core.config import settings
+from src.models.analysis_result_model import AnalysisResultModel
+
+
+logger = logging.getLogger(__name__)
+
+RESULT_COLUMNS = ("verdict", "real_votes", "fake_votes", "total_frames", "confidence", "tier", "model_version")
+
+
+def result_row(task_id, video_id, result):
+    """
+    Строка analysis_results: основные поля результата - колонками, остальные
+    (бюджет кадров, таймкоды, метрики этапов) - в details.
+    """
+    row = {"task_id": task_id, "video_id": video_id}
+    row.update((column, result.get(column)) for column in RESULT_COLUMNS)
+    row["details"] = {key: value for key, value in result.items() if key not in RESULT_COLUMNS}
+    return row
+
+
+class ResultStore:
+    """
+    Запись завершённых анализов в analysis_results пачками: строки копятся в процессе воркера
+    и фоновый поток пишет их одним INSERT, когда набралось batch_size строк или прошло flush_interval секунд.
+    Пока строка не записана, результат отдаётся из result backend Celery.
+    Повторная запись той же пары (task_id, video_id) игнорируется.
+    """
+
+    def __init__(self, db_url, batch_size, flush_interval, max_pending):
+        self.db_url = db_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._rows = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._engine = None
+        self._pid = None
+
+    def _start(self):
+        # Соединения и фоновый поток не переживают fork: в каждом процессе они создаются заново
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._rows = []
+            self._engine = create_engine(self.db_url, pool_size=1, max_overflow=0, pool_pre_ping=True)
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def add(self, task_id, video_id, result):
+        with self._lock:
+            self._start()
+            self._rows.append(result_row(task_id, video_id, result))
+            # Запись идёт в фоновом потоке, задача не ждёт базу
+            if len(self._rows) >= self.batch_size:
+                self._wakeup.set()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return
+            statement = insert(AnalysisResultModel).on_conflict_do_nothing(index_elements=["task_id", "video_id"])
+            try:
+                with self._engine.begin() as connection:
+                    connection.execute(statement, rows)
+            except SQLAlchemyError:
+                logger.exception("Failed to persist %d analysis results", len(rows))
+                # Строки ждут следующей попытки; при долгой недоступности базы старые отбрасываются
+                # и остаются только в result backend до истечения его TTL
+                with self._lock:
+                    self._rows = (rows + self._rows)[-self.max_pending:]
+
+
+def create_result_store():
+    if not settings.result_store_enabled:
+        return None
+    return ResultStore(
+        settings.db_sync_url(),
+        settings.result_store_batch_size,
+        settings.result_store_flush_interval,
+        settings.result_store_max_pending,
+    )
@@ -0,0 +1,244 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.core.config import settings
+from .decoders import iter_positions_seek, iter_positions_sequential, open_decoder
+from .memory import FrameBuffer
+
+
+SAMPLING_MODES = ("auto", "seek", "sequential", "parallel", "keyframe")
+
+
+def sample_frame_indices(frame_count, max_frames):
+    """
+    Равномерно распределённые индексы кадров по всей длине видео.
+    """
+    return np.linspace(0, frame_count - 1, max_frames, dtype=int)
+
+
+def nearest_keyframes(keyframe_idxs, targets):
+    """
+    Позиции ключевых кадров, ближайших к целевым индексам, без повторов и по порядку.
+    """
+    right = np.clip(np.searchsorted(keyframe_idxs, targets), 0, len(keyframe_idxs) - 1)
+    left = np.clip(right - 1, 0, len(keyframe_idxs) - 1)
+    closer_left = np.abs(targets - keyframe_idxs[left]) <= np.abs(keyframe_idxs[right] - targets)
+    return np.unique(np.where(closer_left, left, right))
+
+
+def sample_keyframes(decoder, max_frames):
+    """
+    Выборка по ключевым кадрам: ближайшие к равномерной сетке из max_frames точек,
+    каждый кадр стоит одного декодирования. Возвращает (индексы кадров, время в секундах).
+    Если индекс ключевых кадров недоступен (OpenCV) - точки сетки.
+    """
+    targets = sample_frame_indices(decoder.frame_count, max_frames)
+    keyframes = decoder.keyframes()
+    if keyframes is None or not len(keyframes[0]):
+        return targets, targets / decoder.fps if decoder.fps else None
+    keyframe_idxs, timestamps = keyframes
+    chosen = nearest_keyframes(keyframe_idxs, targets)
+    return keyframe_idxs[chosen], timestamps[chosen]
+
+
+def probe_keyframes(video_path, max_frames):
+    with open_decoder(video_path, decoder_backend("keyframe")) as decoder:
+        return sample_keyframes(decoder, max_frames)
+
+
+def decoder_backend(mode=None):
+    """
+    Декодер для режима чтения: keyframe всегда читается через PyAV - у OpenCV нет индекса ключевых кадров.
+    """
+    return "pyav" if (mode or settings.frame_sampling_mode) == "keyframe" else settings.video_decoder
+
+
+def choose_sampling_mode(frame_count, num_samples, min_density=None):
+    """
+    Выбор стратегии чтения по плотности выборки.
+    При плотной выборке дешевле один раз пройти поток, чем делать seek
+    (каждый seek заново декодирует кадры от предыдущего ключевого).
+    """
+    min_density = settings.sequential_sampling_min_density if min_density is None else min_density
+    if frame_count <= 0:
+        return "seek"
+    return "sequential" if num_samples / frame_count >= min_density else "seek"
+
+
+def parallel_decode_threads():
+    """
+    Число потоков декодирования сегментов на задачу: по умолчанию ядра делятся между процессами воркера.
+    """
+    return settings.parallel_decode_threads or max(1, (os.cpu_count() or 1) // settings.worker_processes)
+
+
+def resolve_sampling_mode(frame_count, num_samples, mode=None):
+    """
+    Режим чтения: явный или выбранный автоматически (parallel - для длинных видео).
+    """
+    mode = mode or settings.frame_sampling_mode
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown frame sampling mode: {mode}")
+    if mode != "auto":
+        return mode
+    if (
+        settings.parallel_decode_min_frames
+        and frame_count >= settings.parallel_decode_min_frames
+        and parallel_decode_threads() > 1
+    ):
+        return "parallel"
+    return choose_sampling_mode(frame_count, num_samples)
+
+
+def iter_frames_seek(cap, frame_idxs):
+    """
+    Чтение кадров через seek на каждый индекс.
+    """
+    for _, frame in iter_positions_seek(cap, frame_idxs):
+        yield frame
+
+
+def iter_frames_sequential(cap, frame_idxs):
+    """
+    Однократный проход по потоку: grab() для пропускаемых кадров,
+    retrieve() только для нужных. frame_idxs должны быть отсортированы.
+    """
+    for _, frame in iter_positions_sequential(cap, frame_idxs):
+        yield frame
+
+
+def decode_segment(video_path, frames, frame_idxs, offset, segment_frames):
+    """
+    Декодирование одного сегмента своим декодером: seek к началу сегмента,
+    затем кадры пишутся в общий массив frames начиная с позиции offset.
+    Возвращает позиции записанных кадров внутри сегмента.
+    """
+    with open_decoder(video_path) as decoder:
+        written = []
+        for position, frame in decoder.read(frame_idxs, choose_sampling_mode(segment_frames, len(frame_idxs))):
+            slot = frames[offset + position]
+            # Кадры другого размера (смена разрешения в потоке) пропускаются
+            if frame.shape == slot.shape:
+                slot[...] = frame
+                written.append(position)
+        return written
+
+
+def iter_frames_parallel(video_path, frame_idxs, frame_count, threads=None):
+    """
+    Параллельное декодирование: линия времени делится на сегменты по порядку frame_idxs,
+    каждый сегмент декодирует отдельный поток со своим декодером (OpenCV и FFmpeg
+    отпускают GIL на время декодирования). Потоки, а не процессы: дочерние процессы
+    prefork-пула Celery - демоны и не могут запускать свои. Порядок кадров совпадает
+    с frame_idxs. Кадры остаются в исходном разрешении: ручные признаки считаются по нему,
+    уменьшает их уже буфер кадров задачи, поэтому режим не ограничен frame_memory_budget.
+    """
+    threads = threads or parallel_decode_threads()
+    segments = [chunk for chunk in np.array_split(np.arange(len(frame_idxs)), threads) if len(chunk)]
+    if not segments:
+        return
+
+    # Размер кадра - по первому кадру выборки (метаданные контейнера могут не учитывать поворот)
+    with open_decoder(video_path) as decoder:
+        first = next(decoder.read(frame_idxs[:1]), (None, None))[1]
+    if first is None:
+        return
+
+    frames = np.empty((len(frame_idxs),) + first.shape, dtype=np.uint8)
+
+    bounds = [int(frame_idxs[chunk[0]]) for chunk in segments] + [frame_count]
+    with ThreadPoolExecutor(len(segments)) as pool:
+        futures = [
+            pool.submit(
+                decode_segment,
+                video_path,
+                frames,
+                frame_idxs[chunk],
+                int(chunk[0]),
+                bounds[i + 1] - bounds[i],
+            )
+            for i, chunk in enumerate(segments)
+        ]
+        # Сегменты отдаются по порядку, как только готовы, без ожидания всего видео
+        for chunk, future in zip(segments, futures):
+            for position in future.result():
+                yield frames[chunk[position]]
+
+
+def probe_frame_count(video_path):
+    """
+    Число кадров по данным декодера.
+    """
+    with open_decoder(video_path) as decoder:
+        return decoder.frame_count
+
+
+def coarse_to_fine_rounds(num_samples, initial_samples):
+    """
+    Разбиение позиций 0..num_samples-1 на раунды от грубого к точному:
+    сначала редкая сетка из ~initial_samples позиций, затем промежуточные.
+    """
+    stride = 1
+    while num_samples / (stride * 2) >= initial_samples:
+        stride *= 2
+
+    taken = np.zeros(num_samples, dtype=bool)
+    rounds = []
+    while stride >= 1:
+        positions = np.arange(0, num_samples, stride)
+        positions = positions[~taken[positions]]
+        taken[positions] = True
+        rounds.append(positions)
+        stride //= 2
+    return rounds
+
+
+def _iter_decoded(video_path, frame_idxs, max_frames, mode):
+    with open_decoder(video_path, decoder_backend(mode)) as decoder:
+        frame_count = decoder.frame_count
+        mode = resolve_sampling_mode(frame_count, max_frames if frame_idxs is None else len(frame_idxs), mode)
+        if frame_idxs is None and mode == "keyframe":
+            frame_idxs, _ = sample_keyframes(decoder, max_frames)
+        elif frame_idxs is None:
+            frame_idxs = sample_frame_indices(frame_count, max_frames)
+        if mode == "parallel":
+            yield from iter_frames_parallel(video_path, frame_idxs, frame_count)
+            return
+        for _, frame in decoder.read(frame_idxs, mode):
+            yield frame
+
+
+def iter_frames(video_path, max_frames=60, mode=None):
+    """
+    Потоковое извлечение max_frames равномерно распределённых кадров.
+    mode: auto, seek, sequential, parallel или keyframe (по умолчанию из настроек);
+    keyframe - ключевые кадры, ближайшие к равномерной сетке.
+    Декодер (OpenCV или PyAV) выбирается настройкой video_decoder.
+    """
+    yield from _iter_decoded(video_path, None, max_frames, mode)
+
+
+def iter_frames_at(video_path, frame_idxs, mode=None):
+    """
+    Потоковое извлечение кадров по заданным (отсортированным) индексам.
+    """
+    yield from _iter_decoded(video_path, frame_idxs, None, mode)
+
+
+def read_frames(video_path, max_frames=60, mode=None):
+    """
+    Извлечение кадров списком.
+    """
+    return list(iter_frames(video_path, max_frames, mode))
+
+
+def extract_frames(video_path, max_frames=60, mode=None, min_side=0):
+    """
+    Кадры списком; при bounded_extraction - уменьшенные при декодировании
+    в одном предвыделенном массиве, а не max_frames отдельных кадров в исходном разрешении.
+    min_side - размер входа модели, меньше которого кадры не уменьшаются.
+    """
+    if not settings.bounded_extraction:
+        return read_frames(video_path, max_frames, mode)
+    buffer = FrameBuffer(max_frames, min_side=min_side)
+    return list(buffer.fill(iter_frames(video_path, max_frames, mode)))
@@ -0,0 +1,136 @@
+import fcntl
+import hashlib
+import os
+import shutil
+import threading
+import urllib.request
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from src.core.config import settings
+
+
+VIDEO_SUFFIX = ".video"
+REMOTE_SCHEMES = ("http", "https")
+
+
+def is_remote(url):
+    return urlparse(url).scheme in REMOTE_SCHEMES
+
+
+class VideoCache:
+    """
+    Локальный кеш исходных видео воркера, адресуемый по содержимому (sha256 файла,
+    либо sha256 URL, если хеш содержимого неизвестен). Объём ограничен, вытесняются
+    давно не использованные файлы. Блокировки flock общие для всех процессов воркера:
+    эксклюзивная - на время скачивания, разделяемая - пока видео декодируется.
+    Файл блокировки вытесняется вместе с видео.
+    """
+
+    def __init__(self, directory, max_bytes, timeout=60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + VIDEO_SUFFIX)
+
+    @contextmanager
+    def fetch(self, url, key=None):
+        """
+        Путь к локальной копии видео; файл не вытесняется, пока открыт контекст.
+        """
+        if not is_remote(url):
+            yield url
+            return
+
+        if not (key and key.isalnum()):
+            key = hashlib.sha256(url.encode()).hexdigest()
+        path = self._path(key)
+        while True:
+            with self._lock(path, fcntl.LOCK_EX) as lock:
+                downloaded = not os.path.exists(path)
+                if downloaded:
+                    self._download(url, path)
+                else:
+                    os.utime(path)
+                fcntl.flock(lock, fcntl.LOCK_SH)
+                # Между снятием эксклюзивной и взятием разделяемой блокировки видео могли вытеснить вместе с файлом блокировки
+                if not (os.path.exists(path) and self._is_current(lock, path)):
+                    continue
+                if downloaded:
+                    self._evict()
+                try:
+                    yield path
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+                return
+
+    @staticmethod
+    def _is_current(lock, path):
+        try:
+            return os.fstat(lock.fileno()).st_ino == os.stat(path + ".lock").st_ino
+        except FileNotFoundError:
+            return False
+
+    def _lock(self, path, flags):
+        """
+        Открытый файл блокировки видео со взятой flock(flags); None, если неблокирующая блокировка занята.
+        Файл блокировки удаляется вместе с видео, поэтому блокировка на уже удалённом файле
+        ничего не охраняет и берётся заново.
+        """
+        while True:
+            lock = open(path + ".lock", "a")
+            try:
+                fcntl.flock(lock, flags)
+            except BlockingIOError:
+                lock.close()
+                return None
+            if self._is_current(lock, path):
+                return lock
+            lock.close()
+
+    def _download(self, url, path):
+        # Потоковая запись во временный файл и атомарное переименование
+        part = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response, open(part, "wb") as f:
+                shutil.copyfileobj(response, f, length=1024 * 1024)
+            os.replace(part, path)
+        finally:
+            if os.path.exists(part):
+                os.unlink(part)
+
+    def _evict(self):
+        """
+        Удаление самых старых по обращению видео, пока объём больше max_bytes.
+        Видео, которые сейчас скачиваются или декодируются, пропускаются.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(VIDEO_SUFFIX):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path = os.path.join(self.directory, name)
+            lock = self._lock(path, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if lock is None:
+                continue
+            with lock:
+                if os.path.exists(path):
+                    os.unlink(path)
+                    total -= size
+                os.unlink(path + ".lock")
+
+
+def create_video_cache():
+    if not settings.video_cache_enabled:
+        return None
+    return VideoCache(settings.video_cache_dir, settings.video_cache_max_bytes, settings.video_download_timeout)